@@ -0,0 +1,270 @@
+"""
+Índice espacial de capitales (distrito, provincia, región) y centroides distritales para
+consultas de vecinos.
+
+Los notebooks de DISTANCIAS responden una sola pregunta fija (distancia de cada capital
+a la capital de su región). Este módulo arma una vez un árbol por tipo de punto y
+responde en lote:
+- nearest(lat, lon, k, tipo): las k capitales más cercanas (ubigeo/código y km)
+- within(lat, lon, radio_km, tipo): todos los puntos dentro del radio
+- nearest_to(codigos, tipo_origen, tipo_destino): p. ej. la capital provincial más
+  cercana a cada capital distrital (excluyendo la propia si se pide)
+
+Los puntos se proyectan a la esfera unitaria (x, y, z) y se indexan con cKDTree de
+scipy: la distancia de cuerda es monótona con la de gran círculo (haversine), así que
+k vecinos y radios son exactos; la cuerda se convierte a km con d = 2R·asin(c/2).
+Fuentes (ya en el repo):
+- capitales distritales: lon_lat_cap_prov.xlsx (lat/lon geocodificados), ubigeo por UbigeoDim
+- capitales provinciales y regionales: distancias_finales_ubigeos.xlsx (UTM 18S → lat/lon)
+- centroides distritales (tipo "centroide"): límites INEI DISTRITO.gpkg (BOUNDARY_FILES de
+  ubigeo_dim), centroide calculado en UTM 18S. Si no hay .gpkg disponible el tipo no se
+  arma y solo quedan las capitales (la capital distrital no sustituye al centroide).
+El índice se guarda en caché (pickle) y se invalida si cambian las fuentes.
+
+Uso:
+    idx = SpatialIndex.load()
+    idx.nearest([-12.05], [-77.04], k=3, tipo="provincia")
+    idx.within([-12.05], [-77.04], radio_km=50, tipo="distrito")
+"""
+import argparse
+import pickle
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "UBIGEO"))
+from ubigeo_dim import BOUNDARY_FILES, MISSING, UbigeoDim, to_code  # noqa: E402
+
+# -------- CONFIG --------
+REPO_DIR = Path(__file__).resolve().parents[2]
+DIST_DIR = REPO_DIR / "distancias" / "cap_regionalxprovincias"
+CAP_DISTRITOS_XLSX = DIST_DIR / "lon_lat_cap_prov.xlsx"
+DISTANCIAS_XLSX = DIST_DIR / "distancias_finales_ubigeos.xlsx"
+SNAPSHOT = DIST_DIR / "indice_espacial.pkl"
+SNAPSHOT_VERSION = 2
+
+CRS_UTM = "EPSG:32718"       # los POINT de los notebooks están en UTM 18S
+EARTH_RADIUS_KM = 6371.0088
+TIPOS = ("distrito", "provincia", "region", "centroide")
+
+
+# -------- geometría --------
+def to_xyz(lat, lon) -> np.ndarray:
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    c = np.cos(lat)
+    return np.column_stack([c * np.cos(lon), c * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+def km_to_chord(km: float) -> float:
+    return 2.0 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _parse_points(s: pd.Series) -> np.ndarray:
+    """'POINT (x y)' → array (n, 2)."""
+    xy = s.astype(str).str.extract(r"POINT\s*\(\s*([-\d.eE]+)\s+([-\d.eE]+)\s*\)").astype(float)
+    return xy.to_numpy()
+
+
+# -------- fuentes --------
+def _existing(boundary_files: Optional[Sequence[Path]]) -> List[Path]:
+    return [p for p in (boundary_files if boundary_files is not None else BOUNDARY_FILES) if p.exists()]
+
+
+def load_centroids(boundary_files: Optional[Sequence[Path]] = None) -> pd.DataFrame:
+    """Centroides de los polígonos distritales (vacío si no hay límites disponibles)."""
+    frames = []
+    for path in _existing(boundary_files):
+        import geopandas as gpd
+
+        gdf = gpd.read_file(path, columns=["IDDIST", "NOMBDIST"])
+        pts = gdf.geometry.to_crs(CRS_UTM).centroid.to_crs("EPSG:4326")
+        frames.append(pd.DataFrame({"tipo": "centroide", "codigo": to_code(gdf["IDDIST"]),
+                                    "nombre": gdf["NOMBDIST"].astype(str).str.strip(),
+                                    "lat": pts.y.to_numpy(), "lon": pts.x.to_numpy()}))
+    if not frames:
+        return pd.DataFrame(columns=["tipo", "codigo", "nombre", "lat", "lon"])
+    out = pd.concat(frames, ignore_index=True).drop_duplicates("codigo", keep="first")
+    return out[(out["codigo"] != MISSING) & out["lat"].notna()]
+
+
+def load_points(cap_distritos: Path = CAP_DISTRITOS_XLSX, distancias: Path = DISTANCIAS_XLSX,
+                dim: Optional[UbigeoDim] = None,
+                boundary_files: Optional[Sequence[Path]] = None) -> pd.DataFrame:
+    """Tabla larga: tipo, codigo (ubigeo / prov / dep), nombre, lat, lon."""
+    from pyproj import Transformer
+
+    dim = dim or UbigeoDim.load()
+    d = pd.read_excel(cap_distritos)
+    d["codigo"] = dim.district_codes(d["NOMBDEP"], d["NOMBPROV"], d["NOMBDIST"])
+    d = d[(d["codigo"] != MISSING) & d["lat"].notna() & d["lon"].notna()]
+    dist = pd.DataFrame({"tipo": "distrito", "codigo": d["codigo"], "nombre": d["CAPITAL"],
+                         "lat": d["lat"], "lon": d["lon"]})
+
+    f = pd.read_excel(distancias, usecols=["ubigeo", "cap_reg", "cap_prov", "cap_region", "cap_provincia"])
+    f = f[f["ubigeo"].notna()]
+    to_ll = Transformer.from_crs(CRS_UTM, "EPSG:4326", always_xy=True)
+    frames = [dist]
+    for tipo, div, name_col, pt_col in [("provincia", 100, "cap_prov", "cap_provincia"),
+                                        ("region", 10000, "cap_reg", "cap_region")]:
+        g = f.assign(codigo=f["ubigeo"].astype(np.int64) // div).drop_duplicates("codigo")
+        xy = _parse_points(g[pt_col])
+        ok = ~np.isnan(xy).any(axis=1)
+        lon, lat = to_ll.transform(xy[ok, 0], xy[ok, 1])
+        frames.append(pd.DataFrame({"tipo": tipo, "codigo": g["codigo"].to_numpy()[ok],
+                                    "nombre": g[name_col].to_numpy()[ok], "lat": lat, "lon": lon}))
+    cent = load_centroids(boundary_files)
+    if len(cent):
+        frames.append(cent)
+    out = pd.concat(frames, ignore_index=True)
+    out["codigo"] = out["codigo"].astype(np.int32)
+    return out
+
+
+# -------- índice --------
+@dataclass
+class SpatialIndex:
+    points: pd.DataFrame
+    trees: Dict[str, cKDTree] = field(default_factory=dict)
+    rows: Dict[str, np.ndarray] = field(default_factory=dict)     # posiciones en points por tipo
+    sources: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, points: pd.DataFrame, sources: Optional[Dict[str, float]] = None) -> "SpatialIndex":
+        points = points.reset_index(drop=True)
+        idx = cls(points=points, sources=sources or {})
+        xyz = to_xyz(points["lat"], points["lon"])
+        for tipo in points["tipo"].unique():
+            rows = np.flatnonzero(points["tipo"].to_numpy() == tipo)
+            idx.rows[tipo] = rows
+            idx.trees[tipo] = cKDTree(xyz[rows])
+        return idx
+
+    @classmethod
+    def load(cls, snapshot: Path = SNAPSHOT, cap_distritos: Path = CAP_DISTRITOS_XLSX,
+             distancias: Path = DISTANCIAS_XLSX,
+             boundary_files: Optional[Sequence[Path]] = None) -> "SpatialIndex":
+        """Carga la foto en caché si las fuentes no cambiaron; si no, reconstruye y guarda."""
+        files = [cap_distritos, distancias, *_existing(boundary_files)]
+        current = {str(p): p.stat().st_mtime for p in files}
+        if snapshot.exists():
+            try:
+                with open(snapshot, "rb") as fh:
+                    version, idx = pickle.load(fh)
+                if version == SNAPSHOT_VERSION and idx.sources == current:
+                    return idx
+            except Exception:
+                pass
+        idx = cls.build(load_points(cap_distritos, distancias, boundary_files=boundary_files), current)
+        idx.save(snapshot)
+        return idx
+
+    def save(self, snapshot: Path = SNAPSHOT) -> None:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        tmp = snapshot.with_suffix(snapshot.suffix + ".tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump((SNAPSHOT_VERSION, self), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(snapshot)
+
+    def _tree(self, tipo: str) -> cKDTree:
+        if tipo not in self.trees:
+            raise KeyError(f"Tipo desconocido: {tipo} (hay {', '.join(self.trees)})")
+        return self.trees[tipo]
+
+    def _result(self, tipo: str, query: np.ndarray, local: np.ndarray, km: np.ndarray) -> pd.DataFrame:
+        pts = self.points.iloc[self.rows[tipo][local]]
+        return pd.DataFrame({
+            "query": query,
+            "codigo": pts["codigo"].to_numpy(),
+            "nombre": pts["nombre"].to_numpy(),
+            "tipo": tipo,
+            "dist_km": km,
+        })
+
+    # ---- consultas ----
+    def nearest(self, lat: Sequence[float], lon: Sequence[float], k: int = 1, tipo: str = "region",
+                workers: int = -1) -> pd.DataFrame:
+        """k vecinos más cercanos de cada punto; una fila por (query, rank)."""
+        tree = self._tree(tipo)
+        k = min(k, tree.n)
+        chord, local = tree.query(to_xyz(lat, lon), k=k, workers=workers)
+        chord = np.asarray(chord).reshape(-1, k)
+        local = np.asarray(local).reshape(-1, k)
+        n = chord.shape[0]
+        out = self._result(tipo, np.repeat(np.arange(n), k), local.ravel(), chord_to_km(chord.ravel()))
+        out.insert(1, "rank", np.tile(np.arange(1, k + 1), n))
+        return out
+
+    def within(self, lat: Sequence[float], lon: Sequence[float], radio_km: float, tipo: str = "distrito",
+               workers: int = -1) -> pd.DataFrame:
+        """Todos los puntos de `tipo` a menos de radio_km de cada punto, ordenados por distancia."""
+        tree = self._tree(tipo)
+        xyz = to_xyz(lat, lon)
+        hits = tree.query_ball_point(xyz, r=km_to_chord(radio_km), workers=workers)
+        counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        query = np.repeat(np.arange(len(hits)), counts)
+        local = np.concatenate([np.asarray(h, dtype=np.int64) for h in hits]) if counts.sum() else np.zeros(0, np.int64)
+        chord = np.linalg.norm(tree.data[local] - xyz[query], axis=1)
+        out = self._result(tipo, query, local, chord_to_km(chord))
+        return out.sort_values(["query", "dist_km"], kind="stable").reset_index(drop=True)
+
+    def coords(self, codigos: Sequence[int], tipo: str) -> pd.DataFrame:
+        pts = self.points.iloc[self.rows[tipo]].drop_duplicates("codigo").set_index("codigo")
+        return pts.reindex(np.asarray(codigos, dtype=np.int32))[["nombre", "lat", "lon"]]
+
+    def nearest_to(self, codigos: Sequence[int], tipo_origen: str = "distrito", tipo_destino: str = "provincia",
+                   k: int = 1, excluir_propio: bool = False) -> pd.DataFrame:
+        """Vecinos de destino para capitales de origen dadas por código (ubigeo / prov / dep)."""
+        codigos = np.asarray(codigos, dtype=np.int32)
+        src = self.coords(codigos, tipo_origen)
+        ok = src["lat"].notna().to_numpy()
+        extra = 1 if excluir_propio and tipo_origen == tipo_destino else 0
+        res = self.nearest(src["lat"].to_numpy()[ok], src["lon"].to_numpy()[ok], k=k + extra, tipo=tipo_destino)
+        res["origen"] = codigos[ok][res["query"].to_numpy()]
+        if extra:
+            res = res[res["codigo"] != res["origen"]]
+            res = res[res.groupby("query").cumcount() < k]
+            res["rank"] = res.groupby("query").cumcount() + 1
+        return res.drop(columns="query")[["origen", "rank", "codigo", "nombre", "tipo", "dist_km"]].reset_index(drop=True)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Capitales más cercanas / dentro de un radio a un punto.")
+    ap.add_argument("--lat", type=float, required=True)
+    ap.add_argument("--lon", type=float, required=True)
+    ap.add_argument("--tipo", choices=TIPOS, default="region")
+    ap.add_argument("--k", type=int, default=1, help="Vecinos más cercanos")
+    ap.add_argument("--radio", type=float, default=None, help="Radio en km (en vez de k vecinos)")
+    ap.add_argument("--rebuild", action="store_true", help="Reconstruir el índice")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    if args.rebuild:
+        SNAPSHOT.unlink(missing_ok=True)
+    idx = SpatialIndex.load()
+    if args.radio is not None:
+        res = idx.within([args.lat], [args.lon], args.radio, tipo=args.tipo)
+    else:
+        res = idx.nearest([args.lat], [args.lon], k=args.k, tipo=args.tipo)
+    print(res.drop(columns="query").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
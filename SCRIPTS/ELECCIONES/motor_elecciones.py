@@ -0,0 +1,202 @@
+"""
+Motor de métricas electorales (ERM 2006-2022) para los niveles distrital, provincial y regional.
+
+Reemplaza el bucle de los notebooks *_consolidados: cada archivo ERM se lee una sola vez
+(en paralelo por año y nivel, solo con las columnas necesarias) y las métricas se calculan
+en una sola pasada agrupada sobre la clave completa (Región, Provincia, Distrito), de modo
+que los distritos homónimos de provincias distintas ya no se mezclan.
+
+Métricas por unidad-año:
+- ganador (organización y tipo), votos y % del ganador
+- margen de victoria (diferencia de % entre primero y segundo)
+- cantidad de postulantes
+- electores, participación (% Participación), votos emitidos y válidos
+- número efectivo de partidos (1 / sum s^2) y HHI de votos (sum s^2)
+
+Las filas "VOTOS EN BLANCO" / "VOTOS NULOS" se descartan al leer, así los % se calculan
+sobre los votos de las organizaciones (= Votos válidos). Las unidades sin votos válidos
+(elecciones anuladas o no realizadas) quedan sin ganador: ganador, votos, %, margen y HHI
+en NA.
+
+La salida es una tabla larga y tipada (una fila por nivel-año-unidad).
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# -------- CONFIG --------
+BASE_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\outputs\elecciones")
+OUT_FILE = BASE_DIR / "data_limpia" / "elecciones_metricas.xlsx"
+
+ANIOS = [2006, 2010, 2014, 2018, 2022]
+N_WORKERS = os.cpu_count() or 1
+
+# nivel -> (carpeta, prefijo de subcarpeta, columnas clave)
+NIVELES: Dict[str, Tuple[str, str, List[str]]] = {
+    "distrital": ("municipalidades_distritales", "MUNICIPAL DISTRITAL", ["Región", "Provincia", "Distrito"]),
+    "provincial": ("municipalidades_provinciales", "MUNICIPAL PROVINCIAL", ["Región", "Provincia"]),
+    "regional": ("regionales", "REGIONAL", ["Región"]),
+}
+KEY_COLS = ["Región", "Provincia", "Distrito"]
+
+# Columnas que se leen de cada archivo (las de clave se agregan según el nivel)
+VALUE_COLS = [
+    "Electores", "% Participación", "Votos emitidos", "Votos válidos",
+    "Organización Política", "Tipo Organización Política", "Votos",
+]
+# Variantes de encabezado entre años
+RENAME = {"Region": "Región"}
+
+
+# -------- lectura --------
+def find_file(base: Path, nivel: str, anio: int) -> Optional[Path]:
+    carpeta, prefijo, _ = NIVELES[nivel]
+    folder = base / carpeta / f"{prefijo} {anio}"
+    if not folder.exists():
+        return None
+    # 2022 provincial se llama ..._Provinciales.xlsx
+    files = sorted(folder.glob(f"ERM{anio}_Resultados_*.xlsx"))
+    return files[0] if files else None
+
+
+def load_results(args: Tuple[str, int, Path]) -> Optional[pd.DataFrame]:
+    """Lee un archivo ERM con columnas proyectadas. Pensado para correr en el pool."""
+    nivel, anio, path = args
+    keys = NIVELES[nivel][2]
+    wanted = set(keys) | set(VALUE_COLS) | set(RENAME)
+    df = pd.read_excel(path, usecols=lambda c: str(c).strip() in wanted)
+    df.columns = [RENAME.get(str(c).strip(), str(c).strip()) for c in df.columns]
+    missing = [c for c in keys + VALUE_COLS if c not in df.columns]
+    if missing:
+        print(f"[WARN] {path.name}: faltan columnas {missing}")
+        return None
+    for c in keys:
+        df[c] = df[c].astype(str).str.strip().str.upper()
+    # las filas de votos en blanco / nulos no son organizaciones políticas
+    org = df["Organización Política"].astype("string").str.strip().str.upper()
+    no_partido = org.str.match(r"^VOTOS (EN BLANCO|NULOS)", na=True) | df["Tipo Organización Política"].isna()
+    df = df[~no_partido.to_numpy()].copy()
+    for c in ["Electores", "% Participación", "Votos emitidos", "Votos válidos", "Votos"]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    for c in [k for k in KEY_COLS if k not in keys]:
+        df[c] = pd.NA
+    df.insert(0, "nivel", nivel)
+    df.insert(1, "year", anio)
+    return df
+
+
+# -------- métricas --------
+def compute_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Una pasada agrupada sobre (nivel, year, Región, Provincia, Distrito)."""
+    group_cols = ["nivel", "year"] + KEY_COLS
+    df = df.sort_values(group_cols + ["Votos"], ascending=[True] * len(group_cols) + [False],
+                        na_position="last", kind="mergesort").reset_index(drop=True)
+    gid = df.groupby(group_cols, sort=False, dropna=False).ngroup().to_numpy()
+    n_groups = gid.max() + 1 if len(gid) else 0
+    rank = df.groupby(gid, sort=False).cumcount().to_numpy()
+
+    votos = df["Votos"].fillna(0).to_numpy(dtype=float)
+    total = np.bincount(gid, weights=votos, minlength=n_groups)
+    share = np.divide(votos, total[gid], out=np.zeros_like(votos), where=total[gid] > 0)
+    hhi = np.bincount(gid, weights=share * share, minlength=n_groups)
+    n_cand = np.bincount(gid, minlength=n_groups)
+
+    first = rank == 0
+    second_share = np.zeros(n_groups)
+    second_share[gid[rank == 1]] = share[rank == 1]
+
+    out = df.loc[first, group_cols + ["Organización Política", "Tipo Organización Política", "Votos",
+                                      "Electores", "% Participación", "Votos emitidos", "Votos válidos"]]
+    out = out.reset_index(drop=True)
+    g = gid[first]
+    out = out.rename(columns={
+        "Organización Política": "ganador",
+        "Tipo Organización Política": "tipo_ganador",
+        "Votos": "votos_ganador",
+        "Electores": "electores",
+        "% Participación": "participacion",
+        "Votos emitidos": "votos_emitidos",
+        "Votos válidos": "votos_validos",
+    })
+    out["pct_ganador"] = share[first]
+    out["margen_victoria"] = share[first] - second_share[g]
+    out["cantidad_postulantes"] = n_cand[g]
+    out["hhi_votos"] = hhi[g]
+    out["nep"] = np.divide(1.0, hhi[g], out=np.full(len(g), np.nan), where=hhi[g] > 0)
+    # sin votos válidos no hay ganador (la primera fila sería arbitraria)
+    sin_votos = total[g] <= 0
+    out.loc[sin_votos, ["ganador", "tipo_ganador", "votos_ganador"]] = pd.NA
+    out.loc[sin_votos, ["pct_ganador", "margen_victoria", "hhi_votos"]] = np.nan
+    return out
+
+
+def to_typed(out: pd.DataFrame) -> pd.DataFrame:
+    out = out.copy()
+    out["nivel"] = pd.Categorical(out["nivel"], categories=list(NIVELES))
+    out["year"] = out["year"].astype("int16")
+    for c in KEY_COLS + ["ganador", "tipo_ganador"]:
+        out[c] = out[c].astype("string")
+    for c in ["votos_ganador", "electores", "votos_emitidos", "votos_validos"]:
+        out[c] = out[c].astype("Int64")
+    out["cantidad_postulantes"] = out["cantidad_postulantes"].astype("int16")
+    for c in ["participacion", "pct_ganador", "margen_victoria", "hhi_votos", "nep"]:
+        out[c] = out[c].astype("float64")
+    return out.sort_values(["nivel", "year"] + KEY_COLS).reset_index(drop=True)
+
+
+# -------- pipeline --------
+def build_db(base: Path, anios: List[int] = ANIOS, niveles: Optional[List[str]] = None,
+             workers: int = N_WORKERS) -> pd.DataFrame:
+    niveles = niveles or list(NIVELES)
+    tasks = []
+    for nivel in niveles:
+        for anio in anios:
+            path = find_file(base, nivel, anio)
+            if path is None:
+                print(f"[SKIP] No hay archivo {nivel} {anio}")
+                continue
+            tasks.append((nivel, anio, path))
+
+    if workers <= 1:
+        frames = [load_results(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            frames = list(ex.map(load_results, tasks))
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        raise RuntimeError("No se pudo construir la base; revisa archivos.")
+    return to_typed(compute_metrics(pd.concat(frames, ignore_index=True, sort=False)))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Métricas electorales ERM en formato largo.")
+    ap.add_argument("--base", type=str, default=str(BASE_DIR), help="Carpeta con los resultados ERM")
+    ap.add_argument("--out", type=str, default=str(OUT_FILE), help="Salida (.xlsx o .parquet)")
+    ap.add_argument("--niveles", nargs="*", default=list(NIVELES), choices=list(NIVELES))
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Procesos en paralelo")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    base = Path(args.base)
+    if not base.exists():
+        raise FileNotFoundError(f"No existe carpeta: {base}")
+    db = build_db(base, niveles=args.niveles, workers=args.workers)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix.lower() == ".parquet":
+        db.to_parquet(out, index=False)
+    else:
+        db.to_excel(out, index=False)
+    print(f"Listo.\n- {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Descarga directa de módulos ENAHO (sin navegador).
+
+Reemplaza el flujo de descarga_enahos.ipynb (Selenium + XPaths fijos + sleeps):
+- arma la URL de cada módulo a partir del código de encuesta INEI por año/periodo
+  (el mismo que usa el portal de microdatos al hacer clic en "STATA")
+- descarga en paralelo con una sesión HTTP con pool de conexiones y reintentos
+- transfiere por bloques y retoma descargas interrumpidas con cabecera Range (.part)
+- lleva un manifiesto JSON con sha256 y tamaño, así los módulos completos no se vuelven a bajar
+- extrae en streaming los .dta del ZIP hacia la carpeta de sumarias, solo los que faltan o
+  son más viejos que el ZIP
+  (el módulo 34 queda como sumaria-{año}.dta, que es lo que espera gini_agregado.do)
+
+--base-url permite apuntar a un servidor local para pruebas.
+"""
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except Exception:
+    print("ERROR: Necesitas instalar 'requests' (pip install requests)")
+    raise
+
+# -------- CONFIG --------
+BASE_URL = "https://proyectos.inei.gob.pe/iinei/srienaho/descarga"
+FORMATO = "STATA"
+ZIP_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\enaho_zip")
+SUMARIA_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\sumaria_enaho\sumarias_dta")
+MANIFEST_NAME = "manifest.json"
+
+MODULO_SUMARIA = 34
+CHUNK_SIZE = 1 << 20     # 1 MiB
+N_WORKERS = 6
+TIMEOUT = 60
+
+# Código de encuesta del portal INEI: (año, periodo) -> código.
+# ENAHO Metodología ACTUALIZADA, Condiciones de Vida y Pobreza, "Anual - (Ene-Dic)".
+CODIGOS_ENCUESTA: Dict[tuple, int] = {
+    (2007, "anual"): 283,
+    (2008, "anual"): 284,
+    (2009, "anual"): 285,
+    (2010, "anual"): 279,
+    (2011, "anual"): 291,
+    (2012, "anual"): 324,
+    (2013, "anual"): 404,
+    (2014, "anual"): 440,
+    (2015, "anual"): 498,
+    (2016, "anual"): 546,
+    (2017, "anual"): 603,
+    (2018, "anual"): 634,
+    (2019, "anual"): 687,
+    (2020, "anual"): 737,
+    (2021, "anual"): 759,
+    (2022, "anual"): 784,
+    (2023, "anual"): 906,
+    (2024, "anual"): 966,
+}
+
+
+@dataclass
+class Modulo:
+    year: int
+    periodo: str
+    codigo: int
+    modulo: int
+
+    @property
+    def zip_name(self) -> str:
+        return f"enaho-{self.year}-{self.periodo}-modulo{self.modulo:02d}.zip"
+
+    def url(self, base_url: str = BASE_URL, formato: str = FORMATO) -> str:
+        # {base}/STATA/{codigo}-Modulo{NN}.zip
+        return f"{base_url.rstrip('/')}/{formato}/{self.codigo}-Modulo{self.modulo:02d}.zip"
+
+    def __str__(self) -> str:
+        return f"{self.year} {self.periodo} M{self.modulo:02d}"
+
+
+def resolve_modulos(years: List[int], modulos: List[int], periodo: str = "anual") -> List[Modulo]:
+    out: List[Modulo] = []
+    for y in years:
+        codigo = CODIGOS_ENCUESTA.get((y, periodo))
+        if codigo is None:
+            print(f"[SKIP] Sin código de encuesta para {y} {periodo}")
+            continue
+        out.extend(Modulo(y, periodo, codigo, m) for m in modulos)
+    return out
+
+
+# -------- HTTP --------
+def make_session(pool: int = N_WORKERS) -> requests.Session:
+    session = requests.Session()
+    retries = Retry(
+        total=5,
+        backoff_factor=0.8,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool, pool_maxsize=pool)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(
+        {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) ENAHO-Downloader/1.0"}
+    )
+    return session
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def download_resumable(session: requests.Session, url: str, dest: Path) -> Path:
+    """Descarga por bloques a dest.part, retomando con Range si ya hay bytes."""
+    part = dest.with_suffix(dest.suffix + ".part")
+    done = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={done}-"} if done else {}
+
+    with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as r:
+        if r.status_code == 416:
+            # el servidor no tiene más bytes: el .part se da por completo solo si es un ZIP válido
+            if zipfile.is_zipfile(part):
+                part.replace(dest)
+                return dest
+            part.unlink(missing_ok=True)
+            if not done:
+                raise RuntimeError(f"HTTP 416 sin bytes descargados para {url}")
+            return download_resumable(session, url, dest)
+        if r.status_code not in (200, 206):
+            raise RuntimeError(f"HTTP {r.status_code} para {url}")
+        mode = "ab" if r.status_code == 206 else "wb"   # 200 = el servidor ignoró Range
+        with open(part, mode) as fh:
+            for block in r.iter_content(chunk_size=CHUNK_SIZE):
+                if block:
+                    fh.write(block)
+    if not zipfile.is_zipfile(part):
+        part.unlink(missing_ok=True)
+        raise RuntimeError(f"La respuesta no es un ZIP válido: {url}")
+    part.replace(dest)
+    return dest
+
+
+# -------- manifiesto --------
+class Manifest:
+    """Registro de ZIPs completos (nombre -> sha256, tamaño, url). Seguro entre hilos."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data: Dict[str, Dict[str, object]] = {}
+        if path.exists():
+            self.data = json.loads(path.read_text(encoding="utf-8"))
+
+    def is_complete(self, zip_path: Path) -> bool:
+        entry = self.data.get(zip_path.name)
+        if not entry or not zip_path.exists():
+            return False
+        return zip_path.stat().st_size == entry["size"] and sha256_file(zip_path) == entry["sha256"]
+
+    def record(self, zip_path: Path, url: str) -> None:
+        entry = {"sha256": sha256_file(zip_path), "size": zip_path.stat().st_size, "url": url}
+        with self.lock:
+            self.data[zip_path.name] = entry
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+
+
+# -------- extracción --------
+def extract_dta(zip_path: Path, m: Modulo, out_dir: Path) -> List[Path]:
+    """Extrae en streaming los .dta del ZIP (sin cargarlos en memoria).
+
+    Solo los que faltan o son más viejos que el ZIP; retorna los extraídos.
+    """
+    result: List[Path] = []
+    zip_mtime = zip_path.stat().st_mtime
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = [x for x in zf.namelist() if x.lower().endswith(".dta")]
+        for member in members:
+            name = Path(member).name
+            if m.modulo == MODULO_SUMARIA and name.lower().startswith("sumaria") and "-12g" not in name.lower():
+                name = f"sumaria-{m.year}.dta"
+            final = out_dir / name
+            if final.exists() and final.stat().st_mtime >= zip_mtime:
+                continue
+            tmp = final.with_suffix(final.suffix + ".tmp")
+            with zf.open(member, "r") as src, open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            tmp.replace(final)
+            result.append(final)
+    return result
+
+
+# -------- pipeline --------
+def process_one(session: requests.Session, m: Modulo, zip_dir: Path, out_dir: Path,
+                manifest: Manifest, base_url: str, extract: bool) -> str:
+    zip_path = zip_dir / m.zip_name
+    url = m.url(base_url)
+    if manifest.is_complete(zip_path):
+        status = "Ya existe"
+    else:
+        download_resumable(session, url, zip_path)
+        manifest.record(zip_path, url)
+        status = "Descargado"
+    if extract:
+        outputs = extract_dta(zip_path, m, out_dir)
+        status += " → " + ", ".join(x.name for x in outputs) if outputs else " (sin .dta nuevos)"
+    return status
+
+
+def run(years: List[int], modulos: List[int], zip_dir: Path, out_dir: Path, periodo: str = "anual",
+        base_url: str = BASE_URL, workers: int = N_WORKERS, extract: bool = True) -> int:
+    zip_dir.mkdir(parents=True, exist_ok=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    todo = resolve_modulos(years, modulos, periodo)
+    print(f"Procesando {len(todo)} módulo(s) con {workers} conexiones")
+    session = make_session(workers)
+    manifest = Manifest(zip_dir / MANIFEST_NAME)
+
+    errors = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(process_one, session, m, zip_dir, out_dir, manifest, base_url, extract): m for m in todo}
+        for fut in as_completed(futs):
+            m = futs[fut]
+            try:
+                print(f"[{m}] {fut.result()}")
+            except Exception as e:
+                errors += 1
+                print(f"[{m}] ERROR: {e}")
+    return errors
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Descarga directa y reanudable de módulos ENAHO (INEI).")
+    ap.add_argument("--start", type=int, default=2007, help="Año inicial")
+    ap.add_argument("--end", type=int, default=2024, help="Año final")
+    ap.add_argument("--modulos", type=int, nargs="+", default=[MODULO_SUMARIA], help="Módulos (ej: 34 = sumaria)")
+    ap.add_argument("--periodo", type=str, default="anual", help="Periodo (según CODIGOS_ENCUESTA)")
+    ap.add_argument("--zips", type=str, default=str(ZIP_DIR), help="Carpeta para ZIPs y manifiesto")
+    ap.add_argument("--out", type=str, default=str(SUMARIA_DIR), help="Carpeta destino de los .dta")
+    ap.add_argument("--base-url", type=str, default=BASE_URL, help="URL base (servidor local para pruebas)")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Descargas simultáneas")
+    ap.add_argument("--no-extract", action="store_true", help="Solo descargar los ZIPs")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    errors = run(
+        years=list(range(args.start, args.end + 1)),
+        modulos=args.modulos,
+        zip_dir=Path(args.zips),
+        out_dir=Path(args.out),
+        periodo=args.periodo,
+        base_url=args.base_url,
+        workers=args.workers,
+        extract=not args.no_extract,
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Lago columnar de microdatos ENAHO: .dta → Parquet particionado por módulo y año.
+
+Completa descarga_enaho_directa.py. Cada .dta descargado se convierte una sola vez:
+- se lee por bloques (pd.read_stata con chunksize), así la memoria pico es la de un bloque
+- nombres armonizados entre cambios de metodología (minúsculas, ALIAS_VARIABLES)
+- identificadores como texto (ubigeo a 6 dígitos), flotantes a float64
+- las etiquetas de valor de Stata quedan como categóricas (diccionario en Parquet);
+  los códigos sin etiqueta se conservan como texto del código
+- etiquetas de variable en los metadatos del esquema
+Salida: {out}/modulo={módulo}/year={año}/part-0.parquet (se omite si el .parquet es más
+nuevo que el .dta).
+
+Para análisis:
+    from enaho_parquet import load
+    df = load("sumaria", ["ubigeo", "inghog1d", "mieperho", "factor07"], years=range(2010, 2020))
+lee solo esas columnas de esos años (proyección en el lector de Parquet).
+"""
+import argparse
+import json
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    print("ERROR: Necesitas instalar 'pyarrow' (pip install pyarrow)")
+    raise
+
+# -------- CONFIG --------
+DTA_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\sumaria_enaho\sumarias_dta")
+OUT_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\enaho_parquet")
+
+CHUNK_ROWS = 50_000
+N_WORKERS = 4
+
+# Variables renombradas entre años / metodologías (nombre normalizado -> canónico)
+ALIAS_VARIABLES: Dict[str, str] = {
+    "ano": "anio",
+    "a_o": "anio",
+    "ubigeo_inei": "ubigeo",
+}
+
+# Identificadores: siempre texto (conservan ceros a la izquierda)
+ID_VARS = {"anio", "mes", "conglome", "vivienda", "hogar", "codperso", "ubigeo", "periodo"}
+ID_WIDTH = {"ubigeo": 6}
+
+
+# -------- nombres --------
+def canonical_name(name: str) -> str:
+    s = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode().lower().strip()
+    s = re.sub(r"[^a-z0-9]+", "_", s).strip("_")
+    return ALIAS_VARIABLES.get(s, s)
+
+
+def module_of(path: Path) -> Tuple[str, Optional[int]]:
+    """('sumaria', 2019) para sumaria-2019.dta; ('enaho01_100', 2019) para enaho01-2019-100.dta."""
+    stem = path.stem.lower()
+    m = re.search(r"(19|20)\d{2}", stem)
+    year = int(m.group(0)) if m else None
+    mod = re.sub(r"(19|20)\d{2}", "", stem)
+    mod = re.sub(r"[^a-z0-9]+", "_", mod).strip("_")
+    return mod or "modulo", year
+
+
+# -------- conversión --------
+def _label_maps(reader) -> Dict[str, Dict[float, str]]:
+    """Variable -> {código: etiqueta} según el conjunto de etiquetas que tenga asignado."""
+    sets = reader.value_labels()
+    lbllist = getattr(reader, "_lbllist", None) or [""] * len(reader._varlist)
+    out = {}
+    for var, lbl in zip(reader._varlist, lbllist):
+        labels = sets.get(lbl) or sets.get(var)
+        if labels:
+            out[var] = {float(k): str(v) for k, v in labels.items()}
+    return out
+
+
+def harmonize_chunk(chunk: pd.DataFrame, labels: Dict[str, Dict[float, str]],
+                    rename: Dict[str, str]) -> pd.DataFrame:
+    out = {}
+    for col in chunk.columns:
+        name = rename[col]
+        s = chunk[col]
+        if name in ID_VARS:
+            s = s.astype("string").str.strip()
+            s = s.str.replace(r"\.0$", "", regex=True)
+            if name in ID_WIDTH:
+                s = s.str.zfill(ID_WIDTH[name])
+        elif col in labels:
+            codes = pd.to_numeric(s, errors="coerce")
+            # código sin etiqueta → su propio texto
+            lut = {u: labels[col].get(u, f"{u:g}") for u in codes.dropna().unique()}
+            s = codes.map(lut).astype("category")
+        elif pd.api.types.is_float_dtype(s):
+            s = s.astype(np.float64)
+        out[name] = s
+    return pd.DataFrame(out)
+
+
+def convert_dta(path: Path, out_dir: Path, force: bool = False) -> str:
+    mod, year = module_of(path)
+    if year is None:
+        return f"[SKIP] Sin año en el nombre: {path.name}"
+    dest_dir = out_dir / f"modulo={mod}" / f"year={year}"
+    dest = dest_dir / "part-0.parquet"
+    if not force and dest.exists() and dest.stat().st_mtime >= path.stat().st_mtime:
+        return f"Ya existe {mod}/{year}"
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(".parquet.tmp")
+
+    rows = 0
+    writer = None
+    schema = None
+    try:
+        with pd.read_stata(path, chunksize=CHUNK_ROWS, convert_categoricals=False,
+                           convert_dates=True, preserve_dtypes=True) as reader:
+            labels = _label_maps(reader)
+            var_labels = reader.variable_labels()
+            rename = {v: canonical_name(v) for v in reader._varlist}
+            meta = {
+                "variable_labels": json.dumps({rename[k]: v for k, v in var_labels.items() if v}, ensure_ascii=False),
+                "source": path.name,
+            }
+            for chunk in reader:
+                df = harmonize_chunk(chunk, labels, rename)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    # categóricas como diccionario de texto; el resto según el primer bloque
+                    fields = [pa.field(f.name, pa.dictionary(pa.int32(), pa.string()))
+                              if pa.types.is_dictionary(f.type) else f for f in table.schema]
+                    schema = pa.schema(fields).with_metadata(meta)
+                    writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+                writer.write_table(table.cast(schema))
+                rows += len(df)
+        if writer is not None:
+            writer.close()
+            tmp.replace(dest)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    return f"{mod}/{year}: {rows} filas"
+
+
+def run(dta_dir: Path, out_dir: Path, workers: int = N_WORKERS, force: bool = False) -> int:
+    files = sorted(p for p in dta_dir.rglob("*") if p.suffix.lower() == ".dta")
+    if not files:
+        raise FileNotFoundError(f"No hay .dta en {dta_dir}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(convert_dta, p, out_dir, force): p for p in files}
+        for fut in as_completed(futs):
+            p = futs[fut]
+            try:
+                print(f"[{p.name}] {fut.result()}")
+            except Exception as e:
+                errors += 1
+                print(f"[{p.name}] ERROR: {e}")
+    return errors
+
+
+# -------- lectura --------
+def available(modulo: str, root: Path = OUT_DIR) -> List[int]:
+    return sorted(int(p.name.split("=", 1)[1]) for p in (root / f"modulo={modulo}").glob("year=*"))
+
+
+def describe(modulo: str, year: Optional[int] = None, root: Path = OUT_DIR) -> pd.DataFrame:
+    """Variables, tipo y etiqueta de un módulo (del año indicado o el último)."""
+    year = year or available(modulo, root)[-1]
+    schema = pq.read_schema(root / f"modulo={modulo}" / f"year={year}" / "part-0.parquet")
+    var_labels = json.loads((schema.metadata or {}).get(b"variable_labels", b"{}"))
+    return pd.DataFrame({
+        "variable": schema.names,
+        "tipo": [str(t) for t in schema.types],
+        "etiqueta": [var_labels.get(n, "") for n in schema.names],
+    })
+
+
+def load(modulo: str, columns: Optional[Iterable[str]] = None, years: Optional[Iterable[int]] = None,
+         root: Path = OUT_DIR) -> pd.DataFrame:
+    """Carga solo las columnas y años pedidos; agrega la columna year."""
+    years = sorted(years) if years is not None else available(modulo, root)
+    wanted = [canonical_name(c) for c in columns] if columns is not None else None
+    frames = []
+    for y in years:
+        path = root / f"modulo={modulo}" / f"year={y}" / "part-0.parquet"
+        if not path.exists():
+            print(f"[WARN] {modulo} sin datos para {y}")
+            continue
+        present = None
+        if wanted is not None:
+            names = set(pq.read_schema(path).names)
+            present = [c for c in wanted if c in names]
+            missing = [c for c in wanted if c not in names]
+            if missing:
+                print(f"[WARN] {modulo} {y}: no tiene {', '.join(missing)}")
+        df = pq.read_table(path, columns=present).to_pandas()
+        df.insert(0, "year", np.int16(y))
+        frames.append(df)
+    if not frames:
+        raise FileNotFoundError(f"No hay datos de {modulo} para {years}")
+    cats = {c for f in frames for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)}
+    out = pd.concat(frames, ignore_index=True, sort=False)
+    # categorías distintas por año → unión
+    for c in cats:
+        if not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype("category")
+    return out
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Convierte los .dta de ENAHO a Parquet por módulo y año.")
+    ap.add_argument("--dta", type=str, default=str(DTA_DIR), help="Carpeta con los .dta")
+    ap.add_argument("--out", type=str, default=str(OUT_DIR), help="Raíz del lago Parquet")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Archivos en paralelo")
+    ap.add_argument("--force", action="store_true", help="Reconvertir aunque el Parquet esté al día")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    errors = run(Path(args.dta), Path(args.out), workers=args.workers, force=args.force)
+    print(f"Listo.\n- {args.out}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Motor de interpolación del IDH distrital.
+
+Automatiza lo que hace interpolación.ipynb: completa los años faltantes de IDH.xlsx
+y rellena los huecos de todos los distritos a la vez.
+
+Métodos:
+- "linear": interpolación lineal respetando el espaciado entre años (vectorizada sobre
+  toda la matriz distrito x año).
+- "polynomial": interp1d de scipy con el orden indicado (el mismo que usa
+  pandas.interpolate(method="polynomial")).
+- "spline": spline cúbico natural.
+- "ucm": modelo de componentes no observados (UnobservedComponents, tendencia lineal
+  local) por distrito, en un pool de procesos, con parámetros iniciales compartidos
+  y caché de resultados por hash de la serie.
+
+Para "polynomial" y "spline" los distritos se agrupan por patrón de años observados,
+de modo que cada grupo se ajusta con una sola llamada sobre una matriz.
+
+La salida es una tabla larga (UBIGEO, ..., year, idh, flag) donde flag indica si el
+valor es observado, interpolado o modelado.
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# -------- CONFIG --------
+IDH_XLSX = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\outputs\IDH\IDH.xlsx")
+OUT_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\outputs\IDH")
+CACHE_FILE = OUT_DIR / "cache_ucm.pkl"
+
+ID_COLS = ["UBIGEO", "DISTRITO", "PROVINCIA", "DEPARTAMENTO"]
+METHODS = ["linear", "polynomial", "spline", "ucm"]
+POLY_ORDER = 2
+UCM_LEVEL = "local linear trend"
+UCM_CHUNK = 64          # distritos por tarea del pool
+N_WORKERS = os.cpu_count() or 1
+
+FLAG_OBSERVADO = "observado"
+FLAG_INTERPOLADO = "interpolado"
+FLAG_MODELADO = "modelado"
+FLAGS = [FLAG_OBSERVADO, FLAG_INTERPOLADO, FLAG_MODELADO]
+
+
+# -------- lectura --------
+def load_idh(path: Path) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Lee IDH.xlsx y devuelve (ids, años, matriz) con todos los años del rango
+    (los que no están en el archivo quedan como NaN, como en el notebook).
+    """
+    data = pd.read_excel(path)
+    data.columns = data.columns.astype(str)
+    data = data.loc[:, ~data.columns.str.startswith("Unnamed")]
+    year_cols = sorted([c for c in data.columns if c.isdigit()], key=int)
+    id_cols = [c for c in data.columns if not c.isdigit()]
+
+    ids = data[id_cols].copy()
+    if "UBIGEO" in ids:
+        ids["UBIGEO"] = ids["UBIGEO"].astype(str).str.zfill(6)
+
+    years_obs = [int(c) for c in year_cols]
+    years = np.arange(min(years_obs), max(years_obs) + 1)
+    values = (data[year_cols].apply(pd.to_numeric, errors="coerce")
+                             .set_axis(years_obs, axis=1)
+                             .reindex(columns=years)
+                             .to_numpy(dtype=float))
+    return ids.reset_index(drop=True), years, values
+
+
+# -------- métodos vectorizados --------
+def interp_linear(years: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Lineal por filas, solo entre observaciones (sin extrapolar)."""
+    n, t = values.shape
+    obs = ~np.isnan(values)
+    cols = np.broadcast_to(np.arange(t), (n, t))
+
+    # Índice del último observado a la izquierda y del primero a la derecha
+    left = np.maximum.accumulate(np.where(obs, cols, -1), axis=1)
+    right = np.minimum.accumulate(np.where(obs, cols, t)[:, ::-1], axis=1)[:, ::-1]
+    inside = (left >= 0) & (right < t)
+
+    rows = np.arange(n)[:, None]
+    li = np.clip(left, 0, t - 1)
+    ri = np.clip(right, 0, t - 1)
+    x0, x1 = years[li], years[ri]
+    y0, y1 = values[rows, li], values[rows, ri]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(x1 > x0, (years[None, :] - x0) / (x1 - x0), 0.0)
+    out = y0 + frac * (y1 - y0)
+    return np.where(obs, values, np.where(inside, out, np.nan))
+
+
+def _by_pattern(values: np.ndarray):
+    """Agrupa filas por patrón de años observados: {patrón: índices de fila}."""
+    obs = ~np.isnan(values)
+    patterns, inverse = np.unique(obs, axis=0, return_inverse=True)
+    for k, pat in enumerate(patterns):
+        yield pat, np.flatnonzero(inverse.ravel() == k)
+
+
+def interp_grouped(years: np.ndarray, values: np.ndarray, method: str, order: int = POLY_ORDER) -> np.ndarray:
+    """Polinómica (interp1d) o spline cúbico, ajustando cada patrón de huecos de una vez."""
+    from scipy.interpolate import CubicSpline, interp1d
+
+    out = values.copy()
+    for pat, rows in _by_pattern(values):
+        n_obs = int(pat.sum())
+        if n_obs < 2 or n_obs == len(pat):
+            continue
+        x = years[pat].astype(float)
+        y = values[np.ix_(rows, pat)]
+        lo, hi = np.flatnonzero(pat)[[0, -1]]
+        target = np.arange(lo, hi + 1)
+        target = target[~pat[target]]
+        if target.size == 0:
+            continue
+        if method == "polynomial":
+            k = min(order, n_obs - 1)
+            f = interp1d(x, y, kind=k, axis=1, assume_sorted=True)
+        else:
+            f = CubicSpline(x, y, axis=1, bc_type="natural") if n_obs > 2 else interp1d(x, y, axis=1)
+        out[np.ix_(rows, target)] = f(years[target].astype(float))
+    return out
+
+
+# -------- modelo de espacio de estados --------
+def series_key(y: np.ndarray, level: str) -> str:
+    h = hashlib.sha1()
+    h.update(level.encode())
+    h.update(np.ascontiguousarray(y, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _fit_ucm(y: np.ndarray, level: str, start_params: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    import warnings
+    from statsmodels.tsa.statespace.structural import UnobservedComponents
+
+    mod = UnobservedComponents(y, level=level)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            res = mod.fit(start_params=start_params, disp=False, maxiter=200)
+        except Exception:
+            res = mod.fit(disp=False, maxiter=200)
+    return res.smoothed_state[0], np.asarray(res.params)
+
+
+def ucm_chunk(args: Tuple[np.ndarray, str, Optional[np.ndarray]]) -> List[np.ndarray]:
+    """Ajusta un bloque de distritos. Pensado para correr en un proceso del pool."""
+    block, level, start_params = args
+    out = []
+    for y in block:
+        if np.isnan(y).all() or (~np.isnan(y)).sum() < 3:
+            out.append(np.full_like(y, np.nan))
+            continue
+        smoothed, _ = _fit_ucm(y, level, start_params)
+        out.append(smoothed)
+    return out
+
+
+def warm_start(values: np.ndarray, level: str) -> Optional[np.ndarray]:
+    """Parámetros de arranque: ajuste sobre la mediana de los distritos completos."""
+    complete = values[(~np.isnan(values)).sum(axis=1) >= 3]
+    if complete.size == 0:
+        return None
+    with np.errstate(all="ignore"):
+        median = np.nanmedian(complete, axis=0) if np.isnan(complete).all(axis=0).sum() == 0 else \
+            np.array([np.nanmedian(c) if (~np.isnan(c)).any() else np.nan for c in complete.T])
+    _, params = _fit_ucm(median, level, None)
+    return params
+
+
+def model_ucm(values: np.ndarray, level: str = UCM_LEVEL, workers: int = N_WORKERS,
+              cache_file: Optional[Path] = CACHE_FILE) -> np.ndarray:
+    cache: Dict[str, np.ndarray] = {}
+    if cache_file is not None and cache_file.exists():
+        with open(cache_file, "rb") as fh:
+            cache = pickle.load(fh)
+
+    keys = [series_key(y, level) for y in values]
+    pending = [i for i, k in enumerate(keys) if k not in cache]
+    print(f"[ucm] {len(values) - len(pending)} en caché, {len(pending)} por ajustar")
+
+    if pending:
+        start_params = warm_start(values, level)
+        chunks = [pending[i:i + UCM_CHUNK] for i in range(0, len(pending), UCM_CHUNK)]
+        tasks = [(values[idx], level, start_params) for idx in chunks]
+        if workers <= 1:
+            results = list(map(ucm_chunk, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                results = list(ex.map(ucm_chunk, tasks))
+        for idx, fitted in zip(chunks, results):
+            for i, s in zip(idx, fitted):
+                cache[keys[i]] = s
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(cache_file.suffix + ".tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(cache, fh)
+            tmp.replace(cache_file)
+
+    fitted = np.vstack([cache[k] for k in keys]) if keys else values.copy()
+    return np.where(np.isnan(values), fitted, values)
+
+
+# -------- API --------
+def fill_matrix(years: np.ndarray, values: np.ndarray, method: str = "linear", **kw) -> np.ndarray:
+    if method == "linear":
+        return interp_linear(years, values)
+    if method in ("polynomial", "spline"):
+        return interp_grouped(years, values, method, order=kw.get("order", POLY_ORDER))
+    if method == "ucm":
+        return model_ucm(values, level=kw.get("level", UCM_LEVEL), workers=kw.get("workers", N_WORKERS),
+                         cache_file=kw.get("cache_file", CACHE_FILE))
+    raise ValueError(f"Método no soportado: {method}. Opciones: {METHODS}")
+
+
+def to_long(ids: pd.DataFrame, years: np.ndarray, original: np.ndarray, filled: np.ndarray,
+            method: str) -> pd.DataFrame:
+    n, t = original.shape
+    flag_fill = FLAG_MODELADO if method == "ucm" else FLAG_INTERPOLADO
+    flag = np.where(~np.isnan(original), FLAG_OBSERVADO, np.where(~np.isnan(filled), flag_fill, None))
+
+    tidy = ids.loc[np.repeat(np.arange(n), t)].reset_index(drop=True)
+    tidy["year"] = np.tile(years, n).astype("int16")
+    tidy["idh"] = filled.ravel()
+    tidy["flag"] = pd.Categorical(flag.ravel(), categories=FLAGS)
+    tidy["metodo"] = method
+    return tidy
+
+
+def interpolate_idh(path: Path, method: str = "linear", **kw) -> pd.DataFrame:
+    ids, years, values = load_idh(path)
+    filled = fill_matrix(years, values, method, **kw)
+    return to_long(ids, years, values, filled, method)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Interpolación del IDH distrital (tabla larga con flags).")
+    ap.add_argument("--idh", type=str, default=str(IDH_XLSX), help="Ruta a IDH.xlsx")
+    ap.add_argument("--method", type=str, default="linear", choices=METHODS, help="Método de relleno")
+    ap.add_argument("--out", type=str, default=None, help="Excel de salida (por defecto IDH_{método}.xlsx)")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Procesos para el método ucm")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    path = Path(args.idh)
+    if not path.exists():
+        raise FileNotFoundError(f"No existe archivo: {path}")
+    tidy = interpolate_idh(path, args.method, workers=args.workers)
+    out = Path(args.out) if args.out else OUT_DIR / f"IDH_{args.method}.xlsx"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tidy.to_excel(out, index=False)
+    print(tidy["flag"].value_counts().to_string())
+    print(f"Listo.\n- {out}")
+
+
+if __name__ == "__main__":
+    main()
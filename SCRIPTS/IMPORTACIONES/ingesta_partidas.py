@@ -0,0 +1,214 @@
+"""
+Ingesta masiva de las partidas de importación (SUNAT) por país.
+
+Reemplaza las celdas copiadas de importaciones_consolidados_paises.ipynb:
+- descubre todos los archivos '{partida} - {año}.xls' bajo IMPORTACIONES/partidas/
+- ubica la fila de encabezados buscando PAIS / CIF $ (en vez de borrar columnas por posición)
+- lee los archivos en paralelo y guarda en caché el resultado de cada uno
+  (clave: ruta + tamaño + fecha de modificación), así que agregar una partida o un año
+  solo cuesta leer ese archivo
+- arma una tabla larga (partida, year, pais, fob, cif, adv, arancel) con vistas por groupby
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# -------- CONFIG --------
+BASE_DIR = Path(r"C:\Users\FERNANDO\Downloads\IMPORTACIONES\partidas")
+CACHE_DIR = BASE_DIR / "_cache"
+OUT_XLSX = BASE_DIR / "importaciones_partidas.xlsx"
+N_WORKERS = os.cpu_count() or 1
+
+FILE_REGEX = re.compile(r"^(\d{10})\s*-\s*(\d{4})\.xlsx?$", re.IGNORECASE)
+
+# encabezado (normalizado) -> columna estándar
+HEADER_MAP = {
+    "pais": "pais",
+    "fob $": "fob",
+    "cif $": "cif",
+    "adv $": "adv",
+    "imp. arancel $": "arancel",
+}
+VALUE_COLS = ["fob", "cif", "adv", "arancel"]
+HEADER_SEARCH_LIMIT = 30
+
+
+# -------- utilidades --------
+def norm_text(s) -> str:
+    s = "" if s is None else str(s)
+    s = s.strip().lower()
+    for a, b in [("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u")]:
+        s = s.replace(a, b)
+    return re.sub(r"\s+", " ", s)
+
+
+def engines_to_try(path: Path):
+    ext = path.suffix.lower()
+    if ext == ".xlsx":
+        return ["openpyxl"]
+    if ext == ".xls":
+        # algunos .xls en realidad son .xlsx o html → probamos varios
+        return ["xlrd", "openpyxl"]
+    return ["openpyxl", "xlrd"]
+
+
+def read_excel_safe(path: Path, header=None, dtype=None) -> Optional[pd.DataFrame]:
+    for eng in engines_to_try(path):
+        try:
+            return pd.read_excel(path, header=header, dtype=dtype, engine=eng)
+        except Exception:
+            continue
+    try:
+        # SUNAT a veces entrega tablas HTML con extensión .xls
+        return pd.read_html(path, header=None)[0].astype(str)
+    except Exception:
+        return None
+
+
+def find_header_row(raw: pd.DataFrame) -> Optional[int]:
+    n = min(len(raw), HEADER_SEARCH_LIMIT)
+    for i in range(n):
+        vals = {norm_text(v) for v in raw.iloc[i, :]}
+        if "pais" in vals and "cif $" in vals:
+            return i
+    return None
+
+
+def clean_numbers(series: pd.Series) -> pd.Series:
+    return (series.astype(str)
+                  .str.replace(r"\s", "", regex=True)
+                  .str.replace(",", "", regex=False)
+                  .replace({"-": pd.NA, "nan": pd.NA, "None": pd.NA, "": pd.NA})
+                  .pipe(pd.to_numeric, errors="coerce"))
+
+
+def discover(base: Path, cache_dir: Path = CACHE_DIR) -> List[Dict[str, object]]:
+    """Lista de archivos con su partida y año, recorriendo todas las subcarpetas."""
+    found = []
+    for path in sorted(base.rglob("*.xls*")):
+        if cache_dir in path.parents:
+            continue
+        m = FILE_REGEX.match(path.name)
+        if m:
+            found.append({"path": path, "partida": m.group(1), "year": int(m.group(2))})
+    return found
+
+
+def cache_path(path: Path, cache_dir: Path) -> Path:
+    st = path.stat()
+    key = f"{path.resolve()}|{st.st_size}|{int(st.st_mtime)}"
+    return cache_dir / (hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+
+# -------- procesamiento por archivo --------
+def parse_one(path: Path, partida: str, year: int) -> Optional[pd.DataFrame]:
+    raw = read_excel_safe(path, header=None, dtype=str)
+    if raw is None:
+        print(f"[ERROR] No se pudo leer {path.name}")
+        return None
+    header_row = find_header_row(raw)
+    if header_row is None:
+        print(f"[WARN] No se halló encabezado PAIS / CIF $ en {path.name}")
+        return None
+
+    cols = [HEADER_MAP.get(norm_text(c)) for c in raw.iloc[header_row]]
+    keep = [i for i, c in enumerate(cols) if c is not None]
+    data = raw.iloc[header_row + 1:, keep].copy()
+    data.columns = [cols[i] for i in keep]
+    data = data.loc[:, ~data.columns.duplicated()]
+
+    data["pais"] = data["pais"].astype(str).str.strip()
+    data = data[data["pais"].ne("") & data["pais"].ne("nan") & ~data["pais"].str.match(r"(?i)^total")]
+    for c in VALUE_COLS:
+        data[c] = clean_numbers(data[c]) if c in data else pd.NA
+    data = data.dropna(subset=["cif"])
+
+    data.insert(0, "partida", partida)
+    data.insert(1, "year", year)
+    return data[["partida", "year", "pais"] + VALUE_COLS].reset_index(drop=True)
+
+
+def load_one(args) -> Optional[pd.DataFrame]:
+    """Lee un archivo usando la caché si está vigente. Pensado para correr en el pool."""
+    item, cache_dir = args
+    cp = cache_path(item["path"], cache_dir)
+    if cp.exists():
+        return pd.read_pickle(cp)
+    df = parse_one(item["path"], item["partida"], item["year"])
+    if df is not None:
+        tmp = cp.with_suffix(".tmp")
+        df.to_pickle(tmp)
+        tmp.replace(cp)
+    return df
+
+
+# -------- pipeline --------
+def build_db(base: Path, cache_dir: Path = CACHE_DIR, workers: int = N_WORKERS) -> pd.DataFrame:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    items = discover(base, cache_dir)
+    if not items:
+        raise RuntimeError(f"No se encontraron partidas en {base}")
+    print(f"{len(items)} archivo(s) encontrados")
+    tasks = [(it, cache_dir) for it in items]
+    if workers <= 1:
+        frames = [load_one(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            frames = list(ex.map(load_one, tasks))
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        raise RuntimeError("No se pudo construir la base; revisa archivos.")
+
+    db = pd.concat(frames, ignore_index=True, sort=False)
+    db["partida"] = db["partida"].astype("category")
+    db["pais"] = db["pais"].astype("category")
+    db["year"] = db["year"].astype("int16")
+    return db
+
+
+# -------- vistas --------
+def por_pais(db: pd.DataFrame, partida: str, valor: str = "cif") -> pd.DataFrame:
+    """Tabla PAIS x año de una partida (equivale a total_{partida}.xlsx del notebook)."""
+    sub = db[db["partida"] == partida]
+    return (sub.groupby(["pais", "year"], observed=True)[valor].sum()
+               .unstack("year")
+               .sort_values(sub["year"].max(), ascending=False))
+
+
+def por_partida(db: pd.DataFrame, valor: str = "cif") -> pd.DataFrame:
+    """Total por partida y año."""
+    return db.groupby(["partida", "year"], observed=True)[valor].sum().unstack("year")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Consolida las partidas de importación SUNAT en una tabla larga.")
+    ap.add_argument("--base", type=str, default=str(BASE_DIR), help="Carpeta IMPORTACIONES/partidas")
+    ap.add_argument("--out", type=str, default=str(OUT_XLSX), help="Excel de salida")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Procesos en paralelo")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    base = Path(args.base)
+    if not base.exists():
+        raise FileNotFoundError(f"No existe carpeta: {base}")
+    db = build_db(base, cache_dir=base / "_cache", workers=args.workers)
+    out = Path(args.out)
+    with pd.ExcelWriter(out) as xw:
+        db.to_excel(xw, sheet_name="largo", index=False)
+        por_partida(db).to_excel(xw, sheet_name="cif_partida")
+        for partida in db["partida"].cat.categories:
+            por_pais(db, partida).to_excel(xw, sheet_name=f"cif_{partida}")
+    print(f"Listo.\n- {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Intervalos de confianza bootstrap para los indicadores de desigualdad regionales.
+
+Replica los indicadores de gini_agregado.do (Gini y GE(2), que en los consolidados
+aparece como "theil", y el Atkinson derivado como en atkinson_index.ipynb) sobre las
+sumarias de la ENAHO y estima su error estándar e intervalos percentiles por
+departamento-año.
+
+Remuestreo: bootstrap reescalado por conglomerados dentro de cada estrato
+(se sortean n_h - 1 conglomerados de los n_h del estrato y los pesos se reescalan
+por n_h / (n_h - 1)). Si la sumaria no trae estrato/conglomerado se remuestrean
+hogares. Las réplicas se procesan en bloques como matrices (réplicas x hogares) y
+los departamento-año se reparten en un pool de procesos con semillas derivadas de
+(SEED, año, dpto), de modo que el resultado no depende del orden de ejecución.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# -------- CONFIG --------
+SUMARIA_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\sumaria_enaho\sumarias_dta")
+OUT_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\outputs\gini\consolidado")
+OUT_XLSX = OUT_DIR / "bootstrap_desigualdad_regiones.xlsx"
+
+YEARS = list(range(2007, 2025))
+N_REPS = 2000          # réplicas por departamento-año
+BLOCK_REPS = 250       # réplicas por bloque (controla memoria: bloque x hogares)
+SEED = 20240101
+ALPHA = 0.05
+N_WORKERS = os.cpu_count() or 1
+
+# Variables de la sumaria (como en gini_agregado.do)
+COL_UBIGEO = "ubigeo"
+COL_INGRESO = "inghog1d"
+COL_MIEMBROS = "mieperho"
+COLS_FACTOR = ["factor07", "factor"]
+COL_ESTRATO = "estrato"
+COL_CONGLOMERADO = "conglome"
+
+# Departamentos (Callao se recodifica como Lima, igual que en el .do)
+DEPARTAMENTOS = {
+    1: "Amazonas", 2: "Ancash", 3: "Apurimac", 4: "Arequipa", 5: "Ayacucho",
+    6: "Cajamarca", 8: "Cusco", 9: "Huancavelica", 10: "Huanuco", 11: "Ica",
+    12: "Junin", 13: "La Libertad", 14: "Lambayeque", 15: "Lima", 16: "Loreto",
+    17: "Madre de Dios", 18: "Moquegua", 19: "Pasco", 20: "Piura", 21: "Puno",
+    22: "San Martin", 23: "Tacna", 24: "Tumbes", 25: "Ucayali",
+}
+
+INDICADORES = ["gini", "theil", "atkinson"]
+
+
+# -------- lectura --------
+def sumaria_path(base: Path, year: int) -> Path:
+    return base / f"sumaria-{year}.dta"
+
+
+def load_sumaria(path: Path) -> pd.DataFrame:
+    """Lee solo las columnas necesarias de la sumaria y arma ipcm, fac2 y dpto."""
+    with pd.read_stata(path, iterator=True, convert_categoricals=False) as rdr:
+        available = set(rdr.variable_labels().keys())
+    factor_col = next((c for c in COLS_FACTOR if c in available), None)
+    if factor_col is None:
+        raise KeyError(f"No se encontró factor de expansión en {path.name}")
+    cols = [COL_UBIGEO, COL_INGRESO, COL_MIEMBROS, factor_col]
+    cols += [c for c in (COL_ESTRATO, COL_CONGLOMERADO) if c in available]
+
+    df = pd.read_stata(path, columns=cols, convert_categoricals=False)
+    ubigeo = df[COL_UBIGEO].astype(str).str.zfill(6)
+    dpto = pd.to_numeric(ubigeo.str[:2], errors="coerce")
+    dpto = dpto.where(dpto != 7, 15)
+
+    out = pd.DataFrame({
+        "dpto": dpto,
+        "ipcm": df[COL_INGRESO] / (df[COL_MIEMBROS] * 12),
+        "fac2": df[factor_col] * df[COL_MIEMBROS],
+    })
+    out["estrato"] = df[COL_ESTRATO].astype(str) if COL_ESTRATO in df else "0"
+    if COL_CONGLOMERADO in df:
+        out["conglome"] = df[COL_CONGLOMERADO].astype(str)
+    else:
+        out["conglome"] = np.arange(len(df)).astype(str)
+    out = out.dropna(subset=["dpto", "ipcm", "fac2"])
+    out = out[out["fac2"] > 0]
+    out["dpto"] = out["dpto"].astype(int)
+    return out.reset_index(drop=True)
+
+
+# -------- kernels ponderados (vectorizados sobre réplicas) --------
+def weighted_indices(x: np.ndarray, w: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Índices ponderados para una matriz de pesos.
+
+    x: ingresos ordenados de menor a mayor, forma (n,).
+    w: pesos, forma (R, n) (una fila por réplica) o (n,).
+    Retorna arrays de forma (R,) con gini, theil (GE(2), como ineqdec0) y atkinson
+    (1 - exp(-theil), como en atkinson_index.ipynb).
+    """
+    w = np.atleast_2d(w)
+    total = w.sum(axis=1)
+    wx = w @ x
+    mu = wx / total
+
+    # Gini con rangos de punto medio: G = 2 * sum(w x F) / sum(w x) - 1
+    F = (np.cumsum(w, axis=1) - 0.5 * w) / total[:, None]
+    gini = 2.0 * ((w * F) @ x) / wx - 1.0
+
+    # GE(2) = 0.5 * (E[x^2] / mu^2 - 1)
+    ex2 = (w @ (x * x)) / total
+    theil = 0.5 * (ex2 / (mu * mu) - 1.0)
+
+    atkinson = 1.0 - np.exp(-theil)
+    return {"gini": gini, "theil": theil, "atkinson": atkinson}
+
+
+def cluster_multipliers(rng: np.random.Generator, strata: np.ndarray, n_clusters: np.ndarray,
+                        reps: int) -> np.ndarray:
+    """
+    Multiplicadores de peso por conglomerado para `reps` réplicas (bootstrap reescalado).
+
+    strata: estrato de cada conglomerado (forma (C,)), ordenado por estrato.
+    n_clusters: número de conglomerados de cada estrato, en el mismo orden.
+    Retorna una matriz (reps, C).
+    """
+    out = np.ones((reps, len(strata)), dtype=float)
+    start = 0
+    for n_h in n_clusters:
+        if n_h > 1:
+            counts = rng.multinomial(n_h - 1, np.full(n_h, 1.0 / n_h), size=reps)
+            out[:, start:start + n_h] = counts * (n_h / (n_h - 1.0))
+        start += n_h
+    return out
+
+
+# -------- bootstrap por departamento-año --------
+def _task_seed(year: int, dpto: int) -> np.random.SeedSequence:
+    return np.random.SeedSequence([SEED, year, dpto])
+
+
+def bootstrap_group(args: Tuple[int, int, pd.DataFrame, int, int, float]) -> List[Dict[str, object]]:
+    """Bootstrap de un departamento-año. Pensado para correr en un proceso del pool."""
+    year, dpto, df, n_reps, block_reps, alpha = args
+    rng = np.random.default_rng(_task_seed(year, dpto))
+
+    df = df.sort_values("ipcm", kind="mergesort")
+    x = df["ipcm"].to_numpy(dtype=float)
+    w = df["fac2"].to_numpy(dtype=float)
+
+    # Índice de conglomerado por hogar, con conglomerados agrupados por estrato
+    clusters = (df[["estrato", "conglome"]].drop_duplicates()
+                  .sort_values(["estrato", "conglome"]).reset_index(drop=True))
+    clusters["cid"] = np.arange(len(clusters))
+    cid = df.merge(clusters, on=["estrato", "conglome"], how="left")["cid"].to_numpy()
+    n_clusters = clusters.groupby("estrato", sort=True).size().to_numpy()
+
+    point = {k: float(v[0]) for k, v in weighted_indices(x, w).items()}
+
+    reps: Dict[str, List[np.ndarray]] = {k: [] for k in INDICADORES}
+    done = 0
+    while done < n_reps:
+        b = min(block_reps, n_reps - done)
+        mult = cluster_multipliers(rng, clusters["estrato"].to_numpy(), n_clusters, b)
+        res = weighted_indices(x, mult[:, cid] * w)
+        for k in INDICADORES:
+            reps[k].append(res[k])
+        done += b
+
+    rows = []
+    for k in INDICADORES:
+        r = np.concatenate(reps[k])
+        r = r[np.isfinite(r)]
+        lo, hi = np.quantile(r, [alpha / 2, 1 - alpha / 2]) if r.size else (np.nan, np.nan)
+        rows.append({
+            "year": year,
+            "dpto": dpto,
+            "n_dep": DEPARTAMENTOS.get(dpto, str(dpto)),
+            "indicador": k,
+            "estimado": point[k],
+            "se": float(r.std(ddof=1)) if r.size > 1 else np.nan,
+            "ci_low": float(lo),
+            "ci_high": float(hi),
+            "n_hogares": len(x),
+            "n_conglomerados": len(clusters),
+            "n_reps": int(r.size),
+        })
+    return rows
+
+
+# -------- pipeline --------
+def iter_tasks(base: Path, years: List[int], n_reps: int, block_reps: int, alpha: float):
+    for year in years:
+        path = sumaria_path(base, year)
+        if not path.exists():
+            print(f"[SKIP] No existe {path.name}")
+            continue
+        df = load_sumaria(path)
+        print(f"[{year}] {len(df)} hogares leídos")
+        for dpto, g in df.groupby("dpto", sort=True):
+            if dpto not in DEPARTAMENTOS:
+                continue
+            yield (year, int(dpto), g[["ipcm", "fac2", "estrato", "conglome"]], n_reps, block_reps, alpha)
+
+
+def run(base: Path, years: List[int], n_reps: int = N_REPS, block_reps: int = BLOCK_REPS,
+        alpha: float = ALPHA, workers: int = N_WORKERS) -> pd.DataFrame:
+    rows: List[Dict[str, object]] = []
+    tasks = iter_tasks(base, years, n_reps, block_reps, alpha)
+    if workers <= 1:
+        for t in tasks:
+            rows.extend(bootstrap_group(t))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for out in ex.map(bootstrap_group, tasks):
+                rows.extend(out)
+    if not rows:
+        raise RuntimeError("No se pudo calcular el bootstrap; revisa las sumarias.")
+    res = pd.DataFrame(rows)
+    res["indicador"] = pd.Categorical(res["indicador"], categories=INDICADORES, ordered=True)
+    return res.sort_values(["indicador", "dpto", "year"]).reset_index(drop=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Bootstrap de Gini/Theil/Atkinson por departamento-año (ENAHO sumaria).")
+    ap.add_argument("--sumarias", type=str, default=str(SUMARIA_DIR), help="Carpeta con sumaria-{año}.dta")
+    ap.add_argument("--out", type=str, default=str(OUT_XLSX), help="Excel de salida")
+    ap.add_argument("--start", type=int, default=YEARS[0], help="Año inicial")
+    ap.add_argument("--end", type=int, default=YEARS[-1], help="Año final")
+    ap.add_argument("--reps", type=int, default=N_REPS, help="Réplicas bootstrap")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Procesos en paralelo")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    base = Path(args.sumarias)
+    if not base.exists():
+        raise FileNotFoundError(f"No existe carpeta: {base}")
+    res = run(base, list(range(args.start, args.end + 1)), n_reps=args.reps, workers=args.workers)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    res.to_excel(out, index=False)
+    print(f"Listo.\n- {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Estadísticas zonales de luces nocturnas por distrito, provincia y región (sin herramientas externas).
+
+Reemplaza la generación externa de los LucesNocturnas_Promedio_*.csv que consume
+CONSOLIDADO_LUCES.ipynb:
+- rasteriza una sola vez los polígonos de DISTRITO.gpkg en una grilla de etiquetas
+  (int32 = ubigeo) alineada al raster de radiancia y la guarda en caché (.npy)
+- lee los rasters (p. ej. los compuestos mensuales de un año) por ventanas, con memoria acotada
+- acumula con bincount por distrito: n, suma, suma de cuadrados, mínimo, máximo,
+  píxeles iluminados y un histograma (para la mediana)
+- como los acumuladores son aditivos, provincia (ubigeo // 100) y región (ubigeo // 10000)
+  salen de sumar los de distrito
+
+La mediana se obtiene del histograma (bins logarítmicos entre HIST_MIN y HIST_MAX), interpolando
+dentro del bin. Se puede probar con GeoTIFFs sintéticos.
+"""
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import rasterio
+    from rasterio.features import rasterize
+    from rasterio.windows import Window
+except Exception:
+    print("ERROR: Necesitas instalar 'rasterio' (pip install rasterio)")
+    raise
+
+# -------- CONFIG --------
+DISTRITOS_GPKG = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\shape_files\Distrito\DISTRITO.gpkg")
+RASTER_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\VIIRS")
+OUT_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\outputs\LUMINOSIDAD_PERU\ZONAL")
+CACHE_DIR = OUT_DIR / "_labels"
+
+ID_COL = "IDDIST"
+BLOCK_ROWS = 1024             # filas por ventana de lectura
+LIT_THRESHOLD = 0.5           # radiancia mínima para considerar un píxel iluminado
+HIST_BINS = 256
+HIST_MIN = 1e-3
+HIST_MAX = 1e4
+
+NIVELES = {"distrito": 1, "provincia": 100, "region": 10000}
+
+
+# -------- grilla de etiquetas --------
+def _grid_key(gpkg: Path, profile: Dict) -> str:
+    h = hashlib.sha1()
+    h.update(str(gpkg.resolve()).encode())
+    h.update(str(gpkg.stat().st_mtime).encode())
+    h.update(str(tuple(profile["transform"])[:6]).encode())
+    h.update(f"{profile['width']}x{profile['height']}|{profile['crs']}".encode())
+    return h.hexdigest()[:16]
+
+
+def label_grid(gpkg: Path, raster_path: Path, cache_dir: Path = CACHE_DIR, id_col: str = ID_COL) -> np.ndarray:
+    """Grilla int32 (0 = fuera de todo distrito) alineada al raster; en caché por grilla y gpkg."""
+    import geopandas as gpd
+
+    with rasterio.open(raster_path) as src:
+        profile = {"transform": src.transform, "width": src.width, "height": src.height, "crs": src.crs}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cached = cache_dir / f"labels_{_grid_key(gpkg, profile)}.npy"
+    if cached.exists():
+        return np.load(cached, mmap_mode="r")
+
+    gdf = gpd.read_file(gpkg, columns=[id_col])
+    if profile["crs"] is not None and gdf.crs is not None and gdf.crs != profile["crs"]:
+        gdf = gdf.to_crs(profile["crs"])
+    codes = pd.to_numeric(gdf[id_col], errors="coerce").fillna(0).astype(np.int32)
+    labels = rasterize(
+        zip(gdf.geometry, codes),
+        out_shape=(profile["height"], profile["width"]),
+        transform=profile["transform"],
+        fill=0,
+        dtype="int32",
+    )
+    tmp = cached.with_suffix(".tmp.npy")
+    np.save(tmp, labels)
+    tmp.replace(cached)
+    (cached.with_suffix(".json")).write_text(json.dumps({"gpkg": str(gpkg), "raster": str(raster_path)}))
+    return labels
+
+
+# -------- acumuladores --------
+class ZonalAccumulator:
+    """Acumuladores aditivos por zona (índice compacto 0..n_zones-1)."""
+
+    def __init__(self, codes: np.ndarray):
+        self.codes = np.asarray(codes, dtype=np.int32)
+        n = len(self.codes)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.total = np.zeros(n)
+        self.sumsq = np.zeros(n)
+        self.vmin = np.full(n, np.inf)
+        self.vmax = np.full(n, -np.inf)
+        self.lit = np.zeros(n, dtype=np.int64)
+        self.hist = np.zeros((n, HIST_BINS + 1), dtype=np.int64)   # bin 0 = <= HIST_MIN
+        self.edges = np.geomspace(HIST_MIN, HIST_MAX, HIST_BINS)
+
+    def add(self, zone: np.ndarray, values: np.ndarray) -> None:
+        n = len(self.codes)
+        self.count += np.bincount(zone, minlength=n)
+        self.total += np.bincount(zone, weights=values, minlength=n)
+        self.sumsq += np.bincount(zone, weights=values * values, minlength=n)
+        self.lit += np.bincount(zone, weights=(values > LIT_THRESHOLD), minlength=n).astype(np.int64)
+        np.minimum.at(self.vmin, zone, values)
+        np.maximum.at(self.vmax, zone, values)
+        b = np.searchsorted(self.edges, values, side="left")
+        self.hist += np.bincount(zone * (HIST_BINS + 1) + b,
+                                 minlength=n * (HIST_BINS + 1)).reshape(n, HIST_BINS + 1)
+
+    def rollup(self, divisor: int) -> "ZonalAccumulator":
+        """Agrega a un nivel superior (provincia = //100, región = //10000)."""
+        parents, inv = np.unique(self.codes // divisor, return_inverse=True)
+        out = ZonalAccumulator(parents)
+        m = len(parents)
+        out.count = np.bincount(inv, weights=self.count, minlength=m).astype(np.int64)
+        out.total = np.bincount(inv, weights=self.total, minlength=m)
+        out.sumsq = np.bincount(inv, weights=self.sumsq, minlength=m)
+        out.lit = np.bincount(inv, weights=self.lit, minlength=m).astype(np.int64)
+        np.minimum.at(out.vmin, inv, self.vmin)
+        np.maximum.at(out.vmax, inv, self.vmax)
+        np.add.at(out.hist, inv, self.hist)
+        return out
+
+    def median(self) -> np.ndarray:
+        cum = np.cumsum(self.hist, axis=1)
+        half = self.count / 2.0
+        idx = np.clip((cum < half[:, None]).sum(axis=1), 0, HIST_BINS)
+        rows = np.arange(len(idx))
+        lo = np.concatenate([[0.0], self.edges])[idx]
+        hi = np.concatenate([self.edges, [self.edges[-1]]])[idx]
+        # interpolación lineal dentro del bin
+        prev = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0)
+        in_bin = self.hist[rows, idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(in_bin > 0, (half - prev) / in_bin, 0.5)
+        med = lo + np.clip(frac, 0, 1) * (hi - lo)
+        return np.where(self.count > 0, med, np.nan)
+
+    def to_frame(self, nivel: str) -> pd.DataFrame:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.total / self.count
+            std = np.sqrt(np.maximum(self.sumsq / self.count - mean * mean, 0.0))
+            lit_share = self.lit / self.count
+        return pd.DataFrame({
+            "nivel": nivel,
+            "codigo": self.codes,
+            "n_pixeles": self.count,
+            "mean": mean,
+            "sum": self.total,
+            "std": std,
+            "min": np.where(self.count > 0, self.vmin, np.nan),
+            "max": np.where(self.count > 0, self.vmax, np.nan),
+            "median": self.median(),
+            "lit_share": lit_share,
+        })
+
+
+# -------- lectura por ventanas --------
+def accumulate_raster(path: Path, labels: np.ndarray, acc: ZonalAccumulator, lut_codes: np.ndarray) -> None:
+    with rasterio.open(path) as src:
+        if (src.height, src.width) != labels.shape:
+            raise ValueError(f"{path.name}: la grilla no coincide con la de etiquetas")
+        nodata = src.nodata
+        for row in range(0, src.height, BLOCK_ROWS):
+            h = min(BLOCK_ROWS, src.height - row)
+            vals = src.read(1, window=Window(0, row, src.width, h)).astype(np.float64, copy=False)
+            lab = np.asarray(labels[row:row + h])
+            ok = (lab > 0) & np.isfinite(vals)
+            if nodata is not None:
+                ok &= vals != nodata
+            if not ok.any():
+                continue
+            zone = np.searchsorted(lut_codes, lab[ok])
+            acc.add(zone, vals[ok])
+
+
+def zonal_stats(rasters: List[Path], gpkg: Path = DISTRITOS_GPKG, cache_dir: Path = CACHE_DIR,
+                labels: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Estadísticas sobre todos los píxeles de todos los rasters (p. ej. 12 meses de un año)."""
+    if not rasters:
+        raise ValueError("No hay rasters para procesar")
+    if labels is None:
+        labels = label_grid(gpkg, rasters[0], cache_dir)
+    codes = np.unique(np.asarray(labels))
+    codes = codes[codes > 0]
+    acc = ZonalAccumulator(codes)
+    for path in rasters:
+        accumulate_raster(path, labels, acc, codes)
+        print(f"  · {path.name}")
+
+    frames = [acc.to_frame("distrito")]
+    for nivel, div in NIVELES.items():
+        if div > 1:
+            frames.append(acc.rollup(div).to_frame(nivel))
+    return pd.concat(frames, ignore_index=True)
+
+
+def rasters_by_year(raster_dir: Path) -> Dict[int, List[Path]]:
+    """Agrupa *.tif por el primer año (19xx/20xx) que aparece en el nombre."""
+    import re
+
+    out: Dict[int, List[Path]] = {}
+    for p in sorted(raster_dir.glob("*.tif")):
+        m = re.search(r"(19|20)\d{2}", p.name)
+        if m:
+            out.setdefault(int(m.group(0)), []).append(p)
+    return out
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Estadísticas zonales de luces nocturnas por distrito/provincia/región.")
+    ap.add_argument("--rasters", type=str, default=str(RASTER_DIR), help="Carpeta con GeoTIFFs (año en el nombre)")
+    ap.add_argument("--gpkg", type=str, default=str(DISTRITOS_GPKG), help="Polígonos distritales (DISTRITO.gpkg)")
+    ap.add_argument("--out", type=str, default=str(OUT_DIR), help="Carpeta de salida")
+    ap.add_argument("--years", type=int, nargs="*", default=None, help="Años a procesar (por defecto todos)")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    by_year = rasters_by_year(Path(args.rasters))
+    years = args.years or sorted(by_year)
+    for year in years:
+        if year not in by_year:
+            print(f"[SKIP] Sin rasters para {year}")
+            continue
+        print(f"[{year}] {len(by_year[year])} raster(s)")
+        res = zonal_stats(by_year[year], Path(args.gpkg), out_dir / "_labels")
+        res.insert(2, "year", year)
+        out = out_dir / f"LucesNocturnas_Zonal_{year}.csv"
+        res.to_csv(out, index=False)
+        print(f"Listo.\n- {out}")
+
+
+if __name__ == "__main__":
+    main()
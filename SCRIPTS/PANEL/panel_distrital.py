@@ -0,0 +1,316 @@
+"""
+Constructor del panel distrito x año con todos los indicadores.
+
+Cada fuente (IDH, luces, distancias, elecciones, desigualdad e inversión) se registra
+una sola vez como un Parquet en formato largo (ubigeo o dep, year, variables...), que se
+regenera solo si cambió el archivo de origen. El panel se arma con DuckDB en una sola
+consulta: se leen únicamente las columnas pedidas y los años pedidos (proyección y
+filtros empujados al lector de Parquet) y se materializa solo el resultado. Cada fuente
+declara sus variables, así pedir una variable solo regenera la fuente que la tiene.
+
+Niveles de las fuentes:
+- "distrito": se une por (ubigeo, year)
+- "departamento": se une por (dep, year) — inversión y desigualdad regional
+- estáticas (sin año): se unen solo por ubigeo — distancias
+
+Uso:
+    python panel_distrital.py --vars idh luces_mean gini_dep --start 2010 --end 2020
+    python panel_distrital.py --root D:/data/outputs      # otra raíz de outputs (pipeline --outputs)
+"""
+import argparse
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import duckdb
+except Exception:
+    print("ERROR: Necesitas instalar 'duckdb' (pip install duckdb)")
+    raise
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "UBIGEO"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "ELECCIONES"))
+from ubigeo_dim import MISSING, UbigeoDim, to_code  # noqa: E402
+
+# -------- CONFIG --------
+REPO_DIR = Path(__file__).resolve().parents[2]
+PANEL_DIR = REPO_DIR / "panel"
+OUT_FILE = PANEL_DIR / "panel_distrital.parquet"
+
+IDH_XLSX = REPO_DIR / "IDH" / "IDH.xlsx"
+LUCES_XLSX = REPO_DIR / "LUMINOSIDAD_PERU" / "CONSOLIDADOS" / "lum_distr_09_023.xlsx"
+DIST_XLSX = REPO_DIR / "distancias" / "cap_regionalxprovincias" / "distancias_finales_ubigeos.xlsx"
+ELECCIONES_DIR = REPO_DIR / "elecciones"
+GINI_DIR = REPO_DIR / "gini" / "consolidado"
+INV_DIR = REPO_DIR / "inversion bruta"
+
+
+# -------- registro de fuentes --------
+@dataclass
+class Source:
+    name: str
+    inputs: List[Path]
+    loader: Callable[[], pd.DataFrame]
+    columns: List[str] = field(default_factory=list)   # variables que produce el loader
+    level: str = "distrito"          # "distrito" | "departamento"
+    static: bool = False             # sin columna year
+
+    @property
+    def path(self) -> Path:
+        return PANEL_DIR / f"{self.name}.parquet"
+
+    def is_stale(self) -> bool:
+        if not self.path.exists():
+            return True
+        built = self.path.stat().st_mtime
+        return any(p.exists() and _mtime(p) > built for p in self.inputs)
+
+    def materialize(self, force: bool = False) -> Path:
+        if force or self.is_stale():
+            df = self.loader()
+            PANEL_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            df.to_parquet(tmp, index=False)
+            tmp.replace(self.path)
+            print(f"[{self.name}] {len(df)} filas → {self.path.name}")
+        return self.path
+
+
+def _mtime(path: Path) -> float:
+    if path.is_dir():
+        return max((p.stat().st_mtime for p in path.rglob("*") if p.is_file()), default=0.0)
+    return path.stat().st_mtime
+
+
+_DIM: Optional[UbigeoDim] = None
+
+
+def dim() -> UbigeoDim:
+    global _DIM
+    if _DIM is None:
+        _DIM = UbigeoDim.load()
+    return _DIM
+
+
+# -------- loaders --------
+def wide_years_to_long(df: pd.DataFrame, id_col: str, value_name: str) -> pd.DataFrame:
+    """Columnas de años ('2007', 2008, ...) -> filas (id, year, valor)."""
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    years = [c for c in df.columns if c.isdigit()]
+    long = df.melt(id_vars=[id_col], value_vars=years, var_name="year", value_name=value_name)
+    long["year"] = long["year"].astype("int16")
+    long[value_name] = pd.to_numeric(long[value_name], errors="coerce")
+    return long.dropna(subset=[value_name])
+
+
+def load_idh() -> pd.DataFrame:
+    long = wide_years_to_long(pd.read_excel(IDH_XLSX), "UBIGEO", "idh")
+    long["ubigeo"] = to_code(long.pop("UBIGEO"))
+    return long[["ubigeo", "year", "idh"]]
+
+
+def load_luces() -> pd.DataFrame:
+    long = wide_years_to_long(pd.read_excel(LUCES_XLSX), "IDDIST", "luces_mean")
+    long["ubigeo"] = to_code(long.pop("IDDIST"))
+    return long[["ubigeo", "year", "luces_mean"]]
+
+
+def load_distancias() -> pd.DataFrame:
+    cols = ["ubigeo", "dist_reg_prov", "dist_reg_distr", "dist_prov_distr"]
+    df = pd.read_excel(DIST_XLSX, usecols=cols)
+    df["ubigeo"] = to_code(df["ubigeo"])
+    return df.drop_duplicates("ubigeo")
+
+
+ELEC_COLS = ["ganador", "tipo_ganador", "pct_ganador", "margen_victoria", "cantidad_postulantes",
+             "participacion", "nep", "hhi_votos"]
+
+
+def load_elecciones() -> pd.DataFrame:
+    import motor_elecciones
+
+    db = motor_elecciones.build_db(ELECCIONES_DIR, niveles=["distrital"])
+    db["ubigeo"] = dim().district_codes(db["Región"], db["Provincia"], db["Distrito"])
+    miss = dim().unmatched(db, "Región", "Provincia", "Distrito")
+    if len(miss):
+        print(f"[elecciones] {len(miss)} distrito(s) sin ubigeo:\n{miss.to_string()}")
+    db = db[db["ubigeo"] != MISSING]
+    out = db[["ubigeo", "year"] + ELEC_COLS].rename(columns={c: f"elec_{c}" for c in ELEC_COLS})
+    return out
+
+
+def regional_to_long(df: pd.DataFrame, value_name: str, agg: str = "first") -> pd.DataFrame:
+    """(dep nombre, year, valor) -> (dep código, year, valor); filas Total/Promedio se descartan."""
+    df = df.copy()
+    df["dep"] = dim().department_codes(df["nombre"])
+    df = df[df["dep"] != MISSING]
+    return df.groupby(["dep", "year"], as_index=False)[value_name].agg(agg)
+
+
+def load_desigualdad() -> pd.DataFrame:
+    out = None
+    for ind in ["gini", "theil", "atkinson"]:
+        long = wide_years_to_long(pd.read_excel(GINI_DIR / f"{ind}_regiones.xlsx"), "n_dep", f"{ind}_dep")
+        long = regional_to_long(long.rename(columns={"n_dep": "nombre"}), f"{ind}_dep")
+        out = long if out is None else out.merge(long, on=["dep", "year"], how="outer")
+    return out
+
+
+def inv_files(inv_dir: Path) -> Dict[str, Path]:
+    return {
+        "inv_real_gcentral": inv_dir / "gob_centralxdep" / "ureales_inv_bruta_gcentrals.xlsx",
+        "inv_real_glocal": inv_dir / "gob_localxdep" / "ureales_inv_bruta_glocales.xlsx",
+        "inv_real_gregional": inv_dir / "gob_regional" / "ureales_inv_bruta_gregionales.xlsx",
+    }
+
+
+INV_FILES = inv_files(INV_DIR)
+
+
+def load_inversion() -> pd.DataFrame:
+    out = None
+    for var, path in INV_FILES.items():
+        wide = pd.read_excel(path)
+        long = wide.melt(id_vars=["Fecha"], var_name="nombre", value_name=var).rename(columns={"Fecha": "year"})
+        long["year"] = long["year"].astype("int16")
+        # Lima y Municipalidad Metropolitana de Lima suman al mismo departamento
+        long = regional_to_long(long, var, agg="sum")
+        out = long if out is None else out.merge(long, on=["dep", "year"], how="outer")
+    return out
+
+
+def builtin_sources() -> Dict[str, Source]:
+    return {s.name: s for s in [
+        Source("idh", [IDH_XLSX], load_idh, ["idh"]),
+        Source("luces", [LUCES_XLSX], load_luces, ["luces_mean"]),
+        Source("distancias", [DIST_XLSX], load_distancias, ["dist_reg_prov", "dist_reg_distr", "dist_prov_distr"],
+               static=True),
+        Source("elecciones", [ELECCIONES_DIR], load_elecciones, [f"elec_{c}" for c in ELEC_COLS]),
+        Source("desigualdad", [GINI_DIR], load_desigualdad, ["gini_dep", "theil_dep", "atkinson_dep"],
+               level="departamento"),
+        Source("inversion", list(INV_FILES.values()), load_inversion, list(INV_FILES), level="departamento"),
+    ]}
+
+
+SOURCES: Dict[str, Source] = builtin_sources()
+
+
+def set_root(root: Path) -> None:
+    """Apunta las fuentes y la carpeta panel/ a otra raíz de outputs (la del pipeline)."""
+    global REPO_DIR, PANEL_DIR, IDH_XLSX, LUCES_XLSX, DIST_XLSX, ELECCIONES_DIR, GINI_DIR, INV_DIR, INV_FILES
+    REPO_DIR = root
+    PANEL_DIR = root / "panel"
+    IDH_XLSX = root / "IDH" / "IDH.xlsx"
+    LUCES_XLSX = root / "LUMINOSIDAD_PERU" / "CONSOLIDADOS" / "lum_distr_09_023.xlsx"
+    DIST_XLSX = root / "distancias" / "cap_regionalxprovincias" / "distancias_finales_ubigeos.xlsx"
+    ELECCIONES_DIR = root / "elecciones"
+    GINI_DIR = root / "gini" / "consolidado"
+    INV_DIR = root / "inversion bruta"
+    INV_FILES = inv_files(INV_DIR)
+    SOURCES.update(builtin_sources())
+
+
+def register(source: Source) -> None:
+    """Agrega una fuente nueva al registro (mismo contrato que las de arriba)."""
+    SOURCES[source.name] = source
+
+
+def variables(source: Source) -> List[str]:
+    """Variables declaradas; si la fuente no las declara, las del esquema de su Parquet."""
+    if source.columns:
+        return list(source.columns)
+    import pyarrow.parquet as pq
+
+    key = {"ubigeo", "dep", "year"}
+    return [c for c in pq.read_schema(source.materialize()).names if c not in key]
+
+
+# -------- panel --------
+def _quote(path: Path) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def build_query(wanted: Dict[str, List[str]], years: List[int]) -> str:
+    year_list = ", ".join(str(int(y)) for y in years)
+    select = ["b.ubigeo", "b.prov", "b.dep", "y.year"]
+    joins = []
+    for i, (name, cols) in enumerate(wanted.items()):
+        src = SOURCES[name]
+        alias = f"s{i}"
+        key = "dep" if src.level == "departamento" else "ubigeo"
+        proj = ", ".join([key] + ([] if src.static else ["year"]) + [f'"{c}"' for c in cols])
+        where = "" if src.static else f" WHERE year IN ({year_list})"
+        sub = f"(SELECT {proj} FROM read_parquet({_quote(src.path)}){where})"
+        on = f"{alias}.{key} = b.{key}" + ("" if src.static else f" AND {alias}.year = y.year")
+        joins.append(f"LEFT JOIN {sub} AS {alias} ON {on}")
+        select += [f'{alias}."{c}"' for c in cols]
+    return (
+        f"SELECT {', '.join(select)}\n"
+        f"FROM dim AS b CROSS JOIN (SELECT unnest([{year_list}]) AS year) AS y\n"
+        + "\n".join(joins)
+        + "\nORDER BY b.ubigeo, y.year"
+    )
+
+
+def build_panel(wanted_vars: Optional[List[str]] = None, years: Optional[List[int]] = None,
+                out: Optional[Path] = None) -> pd.DataFrame:
+    """Panel ubigeo x año solo con las variables y años pedidos (None = todas/todos)."""
+    catalog = {name: variables(src) for name, src in SOURCES.items()}
+    if wanted_vars:
+        unknown = set(wanted_vars) - {v for vs in catalog.values() for v in vs}
+        if unknown:
+            raise KeyError(f"Variables desconocidas: {sorted(unknown)}")
+        wanted = {n: [v for v in vs if v in wanted_vars] for n, vs in catalog.items()}
+        wanted = {n: vs for n, vs in wanted.items() if vs}
+    else:
+        wanted = catalog
+    for name in wanted:
+        SOURCES[name].materialize()
+    if years is None:
+        years = list(range(2007, 2025))
+
+    con = duckdb.connect()
+    con.register("dim", dim().table[["ubigeo", "prov", "dep"]])
+    panel = con.execute(build_query(wanted, years)).df()
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        panel.to_parquet(out, index=False)
+    return panel
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Panel distrito x año con IDH, luces, distancias, elecciones, desigualdad e inversión.")
+    ap.add_argument("--vars", nargs="*", default=None, help="Variables a incluir (por defecto todas)")
+    ap.add_argument("--start", type=int, default=2007, help="Año inicial")
+    ap.add_argument("--end", type=int, default=2024, help="Año final")
+    ap.add_argument("--root", type=str, default=str(REPO_DIR), help="Raíz de outputs con las fuentes")
+    ap.add_argument("--out", type=str, default=None, help="Parquet de salida (por defecto {root}/panel/)")
+    ap.add_argument("--rebuild", action="store_true", help="Regenerar todas las fuentes")
+    ap.add_argument("--list", action="store_true", help="Listar variables disponibles por fuente")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    root = Path(args.root)
+    if root.resolve() != REPO_DIR.resolve():
+        set_root(root)
+    if args.rebuild:
+        for src in SOURCES.values():
+            src.materialize(force=True)
+    if args.list:
+        for name, src in SOURCES.items():
+            print(f"{name} ({src.level}{', estática' if src.static else ''}): {', '.join(variables(src))}")
+        return
+    out = Path(args.out) if args.out else PANEL_DIR / OUT_FILE.name
+    panel = build_panel(args.vars, list(range(args.start, args.end + 1)), out=out)
+    print(f"{len(panel)} filas x {panel.shape[1]} columnas")
+    print(f"Listo.\n- {out}")
+
+
+if __name__ == "__main__":
+    main()
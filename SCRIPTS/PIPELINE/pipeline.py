@@ -0,0 +1,409 @@
+"""
+Orquestador de los notebooks y scripts de SCRIPTS como un DAG de etapas.
+
+Cada etapa declara sus entradas y salidas (rutas relativas a INPUTS_DIR "{in}" o a
+OUTPUTS_DIR "{out}", se permiten comodines). Las dependencias salen solas: una etapa
+depende de la que produce alguno de sus archivos de entrada. Por ejemplo:
+    DEFLACTOR_PBI → inv_* (DEFLACTOR.xlsx)
+    gini_indicadoresxregion → atkinson_index (theil_regiones.xlsx)
+    point_cap_distr → boceto_distritos... → distancias_finales_con_ubigeos
+
+Una etapa se ejecuta solo si está desactualizada: la huella es el sha256 del código de
+la etapa y de los módulos que importa (Stage.code) más el de cada archivo de entrada (los
+hashes de archivos se guardan por tamaño/mtime, así no se releen los shapefiles en cada
+corrida), o si falta una salida.
+Las ramas independientes (LUCES, ELECCIONES, INVERSION, DISTANCIAS...) corren en
+paralelo, cada etapa en su propio proceso, con su tiempo y su log.
+
+Los notebooks se ejecutan como script (celdas de código en orden) después de reescribir
+las rutas de Windows fijadas con os.chdir hacia INPUTS_DIR / OUTPUTS_DIR.
+
+Uso:
+    python pipeline.py                 # todo lo desactualizado
+    python pipeline.py --dry-run       # qué correría
+    python pipeline.py atkinson panel  # esas etapas y lo que necesiten aguas arriba
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# -------- CONFIG --------
+SCRIPTS_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = SCRIPTS_DIR.parent
+INPUTS_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs")
+OUTPUTS_DIR = REPO_DIR                      # el repo replica la carpeta data/outputs
+STATE_DIR = REPO_DIR / ".pipeline"
+
+# prefijos fijados en los notebooks (os.chdir / rutas absolutas)
+WIN_ROOT = "C:/Users/FERNANDO/Documents/PI_INEQUIDAD/scripts_data/data"
+N_WORKERS = os.cpu_count() or 2
+CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str                      # relativo a SCRIPTS_DIR (.ipynb o .py)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)   # solo para .py; admiten {in} / {out}
+    code: List[str] = field(default_factory=list)   # módulos importados (relativos a SCRIPTS_DIR)
+    rewrite: Dict[str, str] = field(default_factory=dict)  # reemplazos en el código del notebook
+
+    @property
+    def path(self) -> Path:
+        return SCRIPTS_DIR / self.script
+
+
+STAGES: List[Stage] = [
+    # MACRO / INVERSION
+    Stage("deflactor", "MACRO/DEFLACTOR_PBI.ipynb",
+          outputs=["{out}/DEFLACTOR.xlsx"]),
+    Stage("inv_gcentral", "INVERSION/inv_gobierno_centralxregion.ipynb",
+          inputs=["{out}/DEFLACTOR.xlsx"],
+          outputs=["{out}/inversion bruta/gob_centralxdep/inv_bruta_gcentral.xlsx",
+                   "{out}/inversion bruta/gob_centralxdep/ureales_inv_bruta_gcentrals.xlsx",
+                   "{out}/inversion bruta/gob_centralxdep/unominales_inv_bruta_gcentrals.xlsx"]),
+    Stage("inv_glocales", "INVERSION/inv_gobiernos_localesxregion.ipynb",
+          inputs=["{out}/DEFLACTOR.xlsx"],
+          outputs=["{out}/inversion bruta/gob_localxdep/inv_bruta_glocales.xlsx",
+                   "{out}/inversion bruta/gob_localxdep/ureales_inv_bruta_glocales.xlsx",
+                   "{out}/inversion bruta/gob_localxdep/unominales_inv_bruta_glocales.xlsx"]),
+    Stage("inv_gregionales", "INVERSION/inv_grobiernos_regionales.ipynb",
+          inputs=["{out}/DEFLACTOR.xlsx"],
+          outputs=["{out}/inversion bruta/gob_regional/porcentaje_inv_bruta_gregionales.xlsx",
+                   "{out}/inversion bruta/gob_regional/ureales_inv_bruta_gregionales.xlsx",
+                   "{out}/inversion bruta/gob_regional/unominales_inv_bruta_gregionales.xlsx"]),
+    Stage("inv_public_privada", "INVERSION/inv_public_privada.ipynb",
+          inputs=["{out}/DEFLACTOR.xlsx"],
+          outputs=["{out}/inversion bruta/nacional/porcentaje_public_priv.xlsx",
+                   "{out}/inversion bruta/nacional/ureales_public_priv.xlsx"]),
+    Stage("inversion_porcentual", "INVERSION/inversion_porcentual.ipynb",
+          outputs=["{out}/INVERSION(%PBI)_trimestral.xlsx", "{out}/INVERSION(%PBI)_anual.xlsx"]),
+    # DESIGUALDAD (gini_{año}.xlsx sale de gini_agregado.do en Stata)
+    Stage("gini_regiones", "INDICES_DESIGUALDAD/gini_indicadoresxregion.ipynb",
+          inputs=["{out}/gini/gini_*.xlsx"],
+          outputs=["{out}/gini/consolidado/gini_regiones.xlsx",
+                   "{out}/gini/consolidado/theil_regiones.xlsx",
+                   "{out}/gini/consolidado/indicadores_año_país.xlsx"]),
+    Stage("atkinson", "INDICES_DESIGUALDAD/atkinson_index.ipynb",
+          inputs=["{out}/gini/consolidado/theil_regiones.xlsx",
+                  "{out}/gini/consolidado/indicadores_año_país.xlsx"],
+          outputs=["{out}/gini/consolidado/atkinson_regiones.xlsx",
+                   "{out}/gini/consolidado/indicesxaño_atkinson.xlsx"]),
+    # LUCES
+    Stage("luces", "LUCES/CONSOLIDADO_LUCES.ipynb",
+          inputs=["{out}/LUMINOSIDAD_PERU/LUCES_DISTRITOS/*.csv",
+                  "{out}/LUMINOSIDAD_PERU/LUCES_PROVINCIA/*.csv",
+                  "{out}/LUMINOSIDAD_PERU/LUCES_REGION/*.csv"],
+          outputs=["{out}/LUMINOSIDAD_PERU/CONSOLIDADOS/lum_distr_09_023.xlsx",
+                   "{out}/LUMINOSIDAD_PERU/CONSOLIDADOS/lum_reg_09_023.xlsx",
+                   "{out}/LUMINOSIDAD_PERU/CONSOLIDADOS/lum_prov_09_023.xlsx"]),
+    # ELECCIONES
+    Stage("elecciones_distritales", "ELECCIONES/elecciones_distritales_consolidados.ipynb",
+          inputs=["{out}/elecciones/municipalidades_distritales/*/ERM*_Resultados_Distrital.xlsx"],
+          outputs=["{out}/elecciones/data_limpia/elecciones_distritales.xlsx"]),
+    Stage("elecciones_provinciales", "ELECCIONES/elecciones_provinciales_consolidados.ipynb",
+          inputs=["{out}/elecciones/municipalidades_provinciales/*/ERM*_Resultados_Provincial*.xlsx"],
+          outputs=["{out}/elecciones/data_limpia/elecciones_provinciales.xlsx"]),
+    Stage("elecciones_regionales", "ELECCIONES/elecciones_regionales_consolidados.ipynb",
+          inputs=["{out}/elecciones/regionales/*/ERM*_Resultados_Regional.xlsx"],
+          outputs=["{out}/elecciones/data_limpia/elecciones_regionales.xlsx"]),
+    # IDH
+    Stage("idh", "IDH/IDH_COMPLETO.ipynb",
+          inputs=["{in}/IDH/distritos_IDH.xlsx",
+                  "{in}/distrito_ciudad_region/ubigeo_dis.xlsx",
+                  "{in}/distrito_ciudad_region/IDH_2003_2019.xlsx"],
+          # el notebook escribe outputs/IDH.xlsx; se lleva a outputs/IDH/, que es lo que leen
+          # interpolación.ipynb y el panel
+          rewrite={f"{WIN_ROOT}/outputs/IDH.xlsx": f"{WIN_ROOT}/outputs/IDH/IDH.xlsx"},
+          outputs=["{out}/IDH/IDH.xlsx"]),
+    # DISTANCIAS (distancia_capdistritos_cap_regiones es una versión previa de
+    # distancia_caprovincia_cap_regiones que escribe el mismo archivo; no se incluye)
+    Stage("point_cap_distr", "DISTANCIAS/point_cap_distr.ipynb",
+          inputs=["{in}/shape_files/Distrito/DISTRITO.gpkg"],
+          outputs=["{out}/distancias/cap_regionalxprovincias/lon_lat_cap_prov.xlsx"]),
+    Stage("dist_provincia_cap_dep", "DISTANCIAS/distancia_cap_regiones_provincias.ipynb",
+          inputs=["{in}/shape_files/GPK/Provincia/PROVINCIA.gpkg",
+                  "{in}/shape_files/capital_dep/capxdep.xlsx"],
+          outputs=["{out}/distancias/cap_regionalxprovincias/dist_provincia_cap_dep.xlsx"]),
+    Stage("dist_cap_to_cap_region", "DISTANCIAS/distancia_caprovincia_cap_regiones.ipynb",
+          inputs=["{in}/shape_files/GPK/Cap_Provincia/Cap_Provincia.*",
+                  "{in}/shape_files/capital_dep/capxdep.xlsx"],
+          outputs=["{out}/distancias/cap_regionalxprovincias/dist_provincia_cap_to_cap_region.xlsx"]),
+    Stage("consolidados_distancias", "DISTANCIAS/boceto_distritos_regiones_rpovincias.ipynb",
+          inputs=["{out}/distancias/cap_regionalxprovincias/lon_lat_cap_prov.xlsx",
+                  "{out}/distancias/cap_regionalxprovincias/dist_provincia_cap_to_cap_region.xlsx"],
+          outputs=["{out}/distancias/cap_regionalxprovincias/consolidados_distancias.xlsx"]),
+    Stage("distancias_ubigeos", "DISTANCIAS/distancias_finales_con_ubigeos.ipynb",
+          inputs=["{out}/distancias/cap_regionalxprovincias/consolidados_distancias.xlsx",
+                  "{out}/distancias/cap_regionalxprovincias/ubigeo_correcto.xlsx"],
+          outputs=["{out}/distancias/cap_regionalxprovincias/distancias_finales_ubigeos.xlsx"]),
+    # PANEL
+    Stage("panel", "PANEL/panel_distrital.py",
+          inputs=["{out}/IDH/IDH.xlsx",
+                  "{out}/LUMINOSIDAD_PERU/CONSOLIDADOS/lum_distr_09_023.xlsx",
+                  "{out}/distancias/cap_regionalxprovincias/distancias_finales_ubigeos.xlsx",
+                  "{out}/elecciones/*/*/ERM*_Resultados_*.xlsx",
+                  "{out}/gini/consolidado/*.xlsx",
+                  "{out}/inversion bruta/*/*.xlsx"],
+          code=["UBIGEO/ubigeo_dim.py", "ELECCIONES/motor_elecciones.py"],
+          args=["--root", "{out}", "--out", "{out}/panel/panel_distrital.parquet"],
+          outputs=["{out}/panel/panel_distrital.parquet"]),
+]
+
+
+# -------- rutas --------
+def resolve(pattern: str, inputs_dir: Path, outputs_dir: Path) -> str:
+    return pattern.replace("{in}", inputs_dir.as_posix()).replace("{out}", outputs_dir.as_posix())
+
+
+def expand(pattern: str) -> List[Path]:
+    """Archivos que calzan con una ruta (con o sin comodines), ordenados."""
+    if not any(ch in pattern for ch in "*?["):
+        p = Path(pattern)
+        return [p] if p.exists() else []
+    anchor = Path(pattern.split("*")[0].split("?")[0].split("[")[0]).parent
+    rel = Path(pattern).relative_to(anchor).as_posix()
+    return sorted(p for p in anchor.glob(rel) if p.is_file())
+
+
+# -------- DAG --------
+class Pipeline:
+    def __init__(self, stages: List[Stage], inputs_dir: Path = INPUTS_DIR, outputs_dir: Path = OUTPUTS_DIR,
+                 state_dir: Path = STATE_DIR):
+        self.stages = {s.name: s for s in stages}
+        self.inputs_dir = inputs_dir
+        self.outputs_dir = outputs_dir
+        self.state_dir = state_dir
+        self.state_path = state_dir / "state.json"
+        self.state = json.loads(self.state_path.read_text(encoding="utf-8")) if self.state_path.exists() else {}
+        self.state.setdefault("stages", {})
+        self.state.setdefault("files", {})
+        self.deps = self._build_deps()
+
+    def _r(self, pattern: str) -> str:
+        return resolve(pattern, self.inputs_dir, self.outputs_dir)
+
+    def _build_deps(self) -> Dict[str, Set[str]]:
+        producer: Dict[str, str] = {}
+        for s in self.stages.values():
+            for out in s.outputs:
+                out = self._r(out)
+                if out in producer:
+                    raise ValueError(f"{out} lo producen {producer[out]} y {s.name}")
+                producer[out] = s.name
+        deps: Dict[str, Set[str]] = {}
+        for s in self.stages.values():
+            deps[s.name] = {name for inp in s.inputs for out, name in producer.items()
+                            if name != s.name and fnmatch.fnmatchcase(out, self._r(inp))}
+        self._check_acyclic(deps)
+        return deps
+
+    @staticmethod
+    def _check_acyclic(deps: Dict[str, Set[str]]) -> None:
+        visiting: Set[str] = set()
+        done: Set[str] = set()
+
+        def visit(n: str) -> None:
+            if n in done:
+                return
+            if n in visiting:
+                raise ValueError(f"Ciclo en el pipeline en la etapa {n}")
+            visiting.add(n)
+            for d in deps[n]:
+                visit(d)
+            visiting.discard(n)
+            done.add(n)
+
+        for n in deps:
+            visit(n)
+
+    def upstream(self, targets: List[str]) -> Set[str]:
+        out: Set[str] = set()
+        todo = list(targets)
+        while todo:
+            n = todo.pop()
+            if n not in self.stages:
+                raise KeyError(f"Etapa desconocida: {n}")
+            if n not in out:
+                out.add(n)
+                todo.extend(self.deps[n])
+        return out
+
+    # -------- huellas --------
+    def file_hash(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path)
+        cached = self.state["files"].get(key)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                h.update(block)
+        self.state["files"][key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+        return h.hexdigest()
+
+    def fingerprint(self, s: Stage) -> str:
+        h = hashlib.sha256()
+        h.update(self.file_hash(s.path).encode())
+        for mod in s.code:
+            h.update(self.file_hash(SCRIPTS_DIR / mod).encode())
+        h.update(json.dumps(s.args).encode())
+        for inp in s.inputs:
+            for p in expand(self._r(inp)):
+                h.update(p.as_posix().encode())
+                h.update(self.file_hash(p).encode())
+        return h.hexdigest()
+
+    def is_stale(self, s: Stage) -> bool:
+        if any(not expand(self._r(o)) for o in s.outputs):
+            return True
+        return self.state["stages"].get(s.name, {}).get("fingerprint") != self.fingerprint(s)
+
+    def save_state(self) -> None:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2, sort_keys=True, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.state_path)
+
+    # -------- ejecución --------
+    def notebook_to_script(self, s: Stage) -> str:
+        """Celdas de código en orden, con las rutas de Windows apuntando a INPUTS_DIR / OUTPUTS_DIR."""
+        nb = json.loads(s.path.read_text(encoding="utf-8"))
+        code = "\n\n".join("".join(c["source"]) for c in nb["cells"] if c["cell_type"] == "code")
+        for old, new in s.rewrite.items():
+            code = code.replace(old, new)
+        if os.sep == "/":
+            # solo las cadenas crudas que son rutas de Windows (r"C:\...", fr"{dir_base}\ERM...")
+            # pasan a separador POSIX; las demás (expresiones regulares) quedan igual
+            win_roots = (WIN_ROOT, WIN_ROOT.replace("/", "\\"))
+
+            def to_posix(m: re.Match) -> str:
+                body = m.group(3)
+                if any(r in body for r in win_roots) or re.search(r"\{\w+\}\\", body):
+                    body = body.replace("\\", "/")
+                return m.group(1) + m.group(2) + body + m.group(2)
+
+            code = re.sub(r"\b(r|fr|rf)([\"'])(.*?)\2", to_posix, code)
+        for sep in ("/", "\\"):
+            root = WIN_ROOT.replace("/", sep)
+            code = code.replace(f"{root}{sep}inputs", self.inputs_dir.as_posix())
+            code = code.replace(f"{root}{sep}outputs", self.outputs_dir.as_posix())
+        return code
+
+    def command(self, s: Stage) -> List[str]:
+        if s.path.suffix == ".ipynb":
+            script = self.state_dir / "scripts" / f"{s.name}.py"
+            script.parent.mkdir(parents=True, exist_ok=True)
+            script.write_text(self.notebook_to_script(s), encoding="utf-8")
+            return [sys.executable, str(script)]
+        return [sys.executable, str(s.path), *(self._r(a) for a in s.args)]
+
+    def run_stage(self, s: Stage) -> float:
+        log = self.state_dir / "logs" / f"{s.name}.log"
+        log.parent.mkdir(parents=True, exist_ok=True)
+        env = dict(os.environ, MPLBACKEND="Agg", PYTHONIOENCODING="utf-8")
+        t0 = time.perf_counter()
+        with open(log, "w", encoding="utf-8") as fh:
+            proc = subprocess.run(self.command(s), cwd=s.path.parent, stdout=fh, stderr=subprocess.STDOUT, env=env)
+        elapsed = time.perf_counter() - t0
+        if proc.returncode != 0:
+            raise RuntimeError(f"código {proc.returncode} (ver {log})")
+        return elapsed
+
+    def run(self, targets: Optional[List[str]] = None, workers: int = N_WORKERS,
+            force: bool = False, dry_run: bool = False) -> int:
+        selected = self.upstream(targets) if targets else set(self.stages)
+        pending = {n: self.deps[n] & selected for n in selected}
+        rerun: Set[str] = set()
+        failed: Set[str] = set()
+        timings: Dict[str, str] = {}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            while pending or running:
+                ready = [n for n, d in pending.items() if not d - set(timings)]
+                for n in sorted(ready):
+                    del pending[n]
+                    s = self.stages[n]
+                    if self.deps[n] & failed:
+                        failed.add(n)
+                        timings[n] = "omitida (falló una dependencia)"
+                    # al correr, las dependencias ya terminaron y la huella ve sus salidas nuevas;
+                    # en dry-run se asume que lo que está aguas abajo de una etapa a rehacer cambia
+                    elif force or (dry_run and self.deps[n] & rerun) or self.is_stale(s):
+                        rerun.add(n)
+                        if dry_run:
+                            timings[n] = "desactualizada"
+                        else:
+                            print(f"[{n}] ejecutando {s.script}")
+                            running[ex.submit(self.run_stage, s)] = n
+                            continue
+                    else:
+                        timings[n] = "al día"
+                    print(f"[{n}] {timings[n]}")
+                if not running:
+                    if pending and not ready:
+                        raise RuntimeError("Dependencias sin resolver: " + ", ".join(pending))
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    n = running.pop(fut)
+                    try:
+                        elapsed = fut.result()
+                        s = self.stages[n]
+                        self.state["stages"][n] = {"fingerprint": self.fingerprint(s), "seconds": round(elapsed, 2),
+                                                   "finished": time.strftime("%Y-%m-%d %H:%M:%S")}
+                        self.save_state()
+                        timings[n] = f"{elapsed:.1f} s"
+                    except Exception as e:
+                        failed.add(n)
+                        timings[n] = f"ERROR: {e}"
+                    print(f"[{n}] {timings[n]}")
+
+        if not dry_run:
+            self.save_state()
+        print("\nResumen:")
+        for n in sorted(timings):
+            print(f"  {n:<26} {timings[n]}")
+        return len(failed)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Ejecuta solo las etapas desactualizadas del pipeline, en paralelo.")
+    ap.add_argument("targets", nargs="*", help="Etapas objetivo (por defecto todas)")
+    ap.add_argument("--inputs", type=str, default=str(INPUTS_DIR), help="Carpeta data/inputs")
+    ap.add_argument("--outputs", type=str, default=str(OUTPUTS_DIR), help="Carpeta data/outputs")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Etapas simultáneas")
+    ap.add_argument("--force", action="store_true", help="Ejecutar aunque estén al día")
+    ap.add_argument("--dry-run", action="store_true", help="Solo mostrar qué se ejecutaría")
+    ap.add_argument("--list", action="store_true", help="Listar etapas y dependencias")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    pipe = Pipeline(STAGES, Path(args.inputs), Path(args.outputs))
+    if args.list:
+        for name, s in pipe.stages.items():
+            deps = ", ".join(sorted(pipe.deps[name])) or "-"
+            print(f"{name:<26} {s.script:<55} ← {deps}")
+        return
+    errors = pipe.run(args.targets or None, workers=args.workers, force=args.force, dry_run=args.dry_run)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Descarga de RENAMU vía API CKAN de datosabiertos.gob.pe y conversión a Parquet.
+
+Reemplaza DESCARGA_RENAMUS.ipynb (un Chrome por año, clics y sleeps fijos):
+- resuelve la URL del ZIP de cada año con package_show de la API CKAN del portal
+- descarga los años en paralelo con una sesión HTTP con pool y reintentos
+- lee cada CSV del ZIP en streaming (sin extraerlo a disco), detecta la codificación
+  (validando UTF-8 sobre el CSV completo, no solo una muestra) y escribe Parquet particionado: {out}/modulo={módulo}/year={año}/part-{i}.parquet
+  (un part por CSV: si un año trae varios ZIP, o dos CSV dan el mismo módulo, no se pisan)
+- cada año se convierte en una carpeta temporal y solo reemplaza los parts anteriores
+  si todos sus ZIP convirtieron; si algo falla el año previo queda intacto
+- los tipos se infieren de una muestra; si una columna no convierte más adelante se
+  reintenta esa columna como texto
+
+Requiere pyarrow.
+"""
+import argparse
+import codecs
+import re
+import shutil
+import sys
+import unicodedata
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except Exception:
+    print("ERROR: Necesitas instalar 'requests' (pip install requests)")
+    raise
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except Exception:
+    print("ERROR: Necesitas instalar 'pyarrow' (pip install pyarrow)")
+    raise
+
+# -------- CONFIG --------
+CKAN_URL = "https://www.datosabiertos.gob.pe/api/3/action/package_show"
+DATASET_SLUG = "registro-nacional-de-municipalidades-renamu-{year}-instituto-nacional-de-estadística-e"
+ZIP_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\renamu\zip")
+OUT_DIR = Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\renamu\parquet")
+
+CHUNK_SIZE = 1 << 20
+BLOCK_SIZE = 16 << 20          # bloque de lectura CSV (bytes)
+SAMPLE_BYTES = 1 << 16         # muestra para detectar delimitador y encabezado
+N_WORKERS = 4
+TIMEOUT = 60
+MAX_TYPE_RETRIES = 50
+
+# Códigos que deben quedar como texto (conservan ceros a la izquierda)
+ID_COL_REGEX = re.compile(r"^(ubigeo|idmunici|ccdd|ccpp|ccdi|cod)", re.IGNORECASE)
+
+
+# -------- CKAN --------
+def make_session(pool: int = N_WORKERS) -> requests.Session:
+    session = requests.Session()
+    retries = Retry(
+        total=5,
+        backoff_factor=0.8,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool, pool_maxsize=pool)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(
+        {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) RENAMU-Downloader/1.0"}
+    )
+    return session
+
+
+def resolve_zip_urls(session: requests.Session, year: int, ckan_url: str = CKAN_URL) -> List[str]:
+    """URLs de los recursos ZIP del dataset RENAMU de un año."""
+    r = session.get(ckan_url, params={"id": DATASET_SLUG.format(year=year)}, timeout=TIMEOUT)
+    if r.status_code != 200:
+        raise RuntimeError(f"HTTP {r.status_code} en package_show ({year})")
+    payload = r.json()
+    if not payload.get("success", True):
+        raise RuntimeError(f"CKAN sin éxito para {year}: {payload.get('error')}")
+    resources = payload.get("result", {}).get("resources", [])
+    urls = [res["url"] for res in resources
+            if str(res.get("format", "")).lower() == "zip" or str(res.get("url", "")).lower().endswith(".zip")]
+    if not urls:
+        raise RuntimeError(f"El dataset {year} no tiene recursos ZIP")
+    return urls
+
+
+def download(session: requests.Session, url: str, dest: Path) -> bool:
+    """Descarga por bloques si no existe. True si descargó."""
+    if dest.exists() and zipfile.is_zipfile(dest):
+        return False
+    tmp = dest.with_suffix(dest.suffix + ".part")
+    with session.get(url, stream=True, timeout=TIMEOUT) as r:
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code} para {url}")
+        with open(tmp, "wb") as fh:
+            for block in r.iter_content(chunk_size=CHUNK_SIZE):
+                if block:
+                    fh.write(block)
+    tmp.replace(dest)
+    return True
+
+
+# -------- conversión --------
+def module_name(member: str) -> str:
+    """Nombre de módulo estable a partir del nombre del CSV (sin año, sin tildes)."""
+    stem = Path(member).stem
+    stem = unicodedata.normalize("NFKD", stem).encode("ascii", "ignore").decode()
+    stem = re.sub(r"(19|20)\d{2}", "", stem.lower())
+    return re.sub(r"[^a-z0-9]+", "_", stem).strip("_") or "modulo"
+
+
+def detect_encoding(zf: zipfile.ZipFile, member: str) -> str:
+    """utf8 solo si todo el CSV decodifica como UTF-8 (decodificación incremental)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with zf.open(member) as fh:
+            for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                decoder.decode(block)
+        decoder.decode(b"", final=True)
+        return "utf8"
+    except UnicodeDecodeError:
+        # los CSV del INEI que no son UTF-8 vienen en Windows-1252
+        return "cp1252"
+
+
+def detect_delimiter(sample: bytes) -> str:
+    head = sample.split(b"\n", 1)[0]
+    return max([b",", b";", b"|", b"\t"], key=head.count).decode()
+
+
+def _failed_column(err: Exception, names: List[str]) -> Optional[str]:
+    m = re.search(r"CSV column #(\d+)", str(err))
+    if m and int(m.group(1)) < len(names):
+        return names[int(m.group(1))]
+    return None
+
+
+def csv_to_parquet(zf: zipfile.ZipFile, member: str, dest: Path) -> int:
+    """Convierte un CSV del ZIP a Parquet en streaming. Retorna filas escritas."""
+    with zf.open(member) as fh:
+        sample = fh.read(SAMPLE_BYTES)
+    encoding = detect_encoding(zf, member)
+    delimiter = detect_delimiter(sample)
+    header = sample.split(b"\n", 1)[0].decode(encoding, errors="ignore").strip("\r\ufeff")
+    as_text: Dict[str, pa.DataType] = {
+        c.strip('"'): pa.string() for c in header.split(delimiter) if ID_COL_REGEX.match(c.strip('"'))
+    }
+
+    for _ in range(MAX_TYPE_RETRIES):
+        tmp = dest.with_suffix(".parquet.tmp")
+        writer = None
+        rows = 0
+        names: List[str] = []
+        try:
+            with zf.open(member) as fh:
+                reader = pacsv.open_csv(
+                    fh,
+                    read_options=pacsv.ReadOptions(encoding=encoding, block_size=BLOCK_SIZE),
+                    parse_options=pacsv.ParseOptions(delimiter=delimiter),
+                    convert_options=pacsv.ConvertOptions(column_types=as_text, strings_can_be_null=True),
+                )
+                names = reader.schema.names
+                for batch in reader:
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp, reader.schema, compression="zstd")
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+            if writer is not None:
+                writer.close()
+                tmp.replace(dest)
+            return rows
+        except pa.ArrowInvalid as e:
+            if writer is not None:
+                writer.close()
+            tmp.unlink(missing_ok=True)
+            col = _failed_column(e, names)
+            if col is None or col in as_text:
+                raise
+            # la inferencia del primer bloque no sirvió para esta columna → texto
+            as_text[col] = pa.string()
+    raise RuntimeError(f"Demasiadas columnas con tipos inconsistentes en {member}")
+
+
+def convert_zip(zip_path: Path, year: int, out_dir: Path, parts: Dict[str, int]) -> List[str]:
+    """parts lleva el siguiente número de part por módulo dentro del año."""
+    done: List[str] = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for member in zf.namelist():
+            if not member.lower().endswith(".csv"):
+                continue
+            mod = module_name(member)
+            i = parts.get(mod, 0)
+            parts[mod] = i + 1
+            part_dir = out_dir / f"modulo={mod}" / f"year={year}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            rows = csv_to_parquet(zf, member, part_dir / f"part-{i}.parquet")
+            done.append(f"{mod} part-{i} ({rows} filas)")
+    return done
+
+
+# -------- pipeline --------
+def swap_year(staging: Path, out_dir: Path, year: int) -> None:
+    """Reemplaza los parts del año por los recién convertidos en staging."""
+    for old in out_dir.glob(f"modulo=*/year={year}/part-*.parquet"):
+        old.unlink()
+    for new in staging.glob(f"modulo=*/year={year}/part-*.parquet"):
+        dest = out_dir / new.relative_to(staging)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        new.replace(dest)
+
+
+def process_year(session: requests.Session, year: int, zip_dir: Path, out_dir: Path, ckan_url: str) -> str:
+    msgs = []
+    urls = resolve_zip_urls(session, year, ckan_url)
+    staging = out_dir / f".staging-{year}"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        parts: Dict[str, int] = {}
+        for i, url in enumerate(urls):
+            zip_path = zip_dir / (f"renamu-{year}.zip" if i == 0 else f"renamu-{year}-{i}.zip")
+            downloaded = download(session, url, zip_path)
+            converted = convert_zip(zip_path, year, staging, parts)
+            msgs.append(f"{'Descargado' if downloaded else 'Ya existe'} {zip_path.name} → {', '.join(converted)}")
+        swap_year(staging, out_dir, year)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return "; ".join(msgs)
+
+
+def run(years: List[int], zip_dir: Path, out_dir: Path, ckan_url: str = CKAN_URL, workers: int = N_WORKERS) -> int:
+    zip_dir.mkdir(parents=True, exist_ok=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    session = make_session(workers)
+    errors = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(process_year, session, y, zip_dir, out_dir, ckan_url): y for y in years}
+        for fut in as_completed(futs):
+            y = futs[fut]
+            try:
+                print(f"[{y}] {fut.result()}")
+            except Exception as e:
+                errors += 1
+                print(f"[{y}] ERROR: {e}")
+    return errors
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Descarga RENAMU por API CKAN y convierte los CSV a Parquet.")
+    ap.add_argument("--start", type=int, default=2007, help="Año inicial")
+    ap.add_argument("--end", type=int, default=2023, help="Año final")
+    ap.add_argument("--zips", type=str, default=str(ZIP_DIR), help="Carpeta para los ZIP")
+    ap.add_argument("--out", type=str, default=str(OUT_DIR), help="Carpeta raíz del Parquet particionado")
+    ap.add_argument("--ckan-url", type=str, default=CKAN_URL, help="Endpoint package_show")
+    ap.add_argument("--workers", type=int, default=N_WORKERS, help="Años en paralelo")
+    return ap.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    errors = run(
+        years=list(range(args.start, args.end + 1)),
+        zip_dir=Path(args.zips),
+        out_dir=Path(args.out),
+        ckan_url=args.ckan_url,
+        workers=args.workers,
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
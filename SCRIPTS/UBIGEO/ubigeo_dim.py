@@ -0,0 +1,282 @@
+"""
+Dimensión ubigeo compartida para todos los cruces a nivel distrito.
+
+Junta en un solo lugar lo que los notebooks rehacen a mano (zfill(6) en IDH_COMPLETO,
+unidecode + 'LIMA METROPOLITANA' -> 'LIMA' en DISTANCIAS, IDDIST en LUCES, nombres
+crudos en ELECCIONES):
+
+- códigos enteros compactos (int32): ubigeo distrital, provincia = ubigeo // 100,
+  departamento = ubigeo // 10000
+- diccionario de nombres normalizados (sin tildes, Ñ -> N, mayúsculas, sin guiones ni
+  dobles espacios) por nivel, más una tabla de alias conocidos
+- búsquedas vectorizadas nombre -> código (con pandas .map sobre claves normalizadas) y
+  código -> jerarquía (departamento, provincia, nombres)
+- foto binaria en caché (pickle) que se invalida si cambian los archivos fuente
+- reporte de nombres sin match, para que los cruces no pierdan filas en silencio
+
+Uso típico:
+    dim = UbigeoDim.load()
+    df["ubigeo"] = dim.district_codes(df["Región"], df["Provincia"], df["Distrito"])
+"""
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# -------- CONFIG --------
+REPO_DIR = Path(__file__).resolve().parents[2]
+UBIGEO_CSV = REPO_DIR / "distancias" / "cap_regionalxprovincias" / "ubigeo_distritos.csv"
+# Límites INEI (opcional): se agregan los distritos/nombres que no estén en el CSV
+BOUNDARY_FILES = [
+    Path(r"C:\Users\FERNANDO\Documents\PI_INEQUIDAD\scripts_data\data\inputs\shape_files\Distrito\DISTRITO.gpkg"),
+]
+SNAPSHOT = REPO_DIR / "distancias" / "cap_regionalxprovincias" / "ubigeo_dim.pkl"
+SNAPSHOT_VERSION = 1
+
+MISSING = -1
+
+# Alias conocidos (ya normalizados) -> código. Versionar aquí cuando aparezcan nuevos.
+ALIASES_VERSION = "2025.2"
+ALIASES_DEP: Dict[str, int] = {
+    "LIMA METROPOLITANA": 15,
+    "LIMA PROVINCIAS": 15,
+    "LIMA REGION": 15,
+    "REGION LIMA": 15,
+    "MUNICIPALIDAD METROPOLITANA DE LIMA": 15,
+    "PROV CONST DEL CALLAO": 7,
+    "PROVINCIA CONSTITUCIONAL DEL CALLAO": 7,
+    "PROV CONST CALLAO": 7,
+    "CUZCO": 8,
+}
+# (código de departamento, nombre de provincia) -> código de provincia
+ALIASES_PROV: Dict[Tuple[int, str], int] = {
+    (7, "PROV CONST DEL CALLAO"): 701,
+    (7, "PROVINCIA CONSTITUCIONAL DEL CALLAO"): 701,
+    (8, "CUZCO"): 801,
+    (2, "ANTONIO RAIMONDI"): 203,
+    (11, "NAZCA"): 1103,
+}
+# (código de provincia, nombre de distrito) -> ubigeo
+ALIASES_DIST: Dict[Tuple[int, str], int] = {
+    (801, "CUZCO"): 80101,
+    (201, "PAMPAS"): 20109,
+    (205, "ANTONIO RAIMONDI"): 20503,
+    (401, "SANTA RITA DE SIHUAS"): 40121,
+    (903, "HUALLAY GRANDE"): 90308,
+    (105, "SAN FRANCISCO DE YESO"): 10517,
+    (106, "MILPUCC"): 10608,
+    (304, "HUAYLLO"): 30407,
+    (307, "HUAILLATI"): 30704,
+    (307, "MARISCAL GAMARRA"): 30703,
+    (1103, "NAZCA"): 110301,
+    (1209, "SAN JUAN DE YSCOS"): 120906,
+    (1507, "LARAOS"): 150712,
+    (2207, "CASPIZAPA"): 220703,
+}
+
+
+# -------- normalización --------
+def normalize_names(s: pd.Series) -> pd.Series:
+    """Normaliza nombres de forma vectorizada: sin tildes, mayúsculas, sin puntuación."""
+    s = s.astype("string").fillna("")
+    s = s.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    s = s.str.upper().str.replace(r"[_\-\.,'/()]", " ", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def normalize_name(name: str) -> str:
+    return normalize_names(pd.Series([name])).iloc[0]
+
+
+def _compact(s: pd.Series) -> pd.Series:
+    return s.str.replace(" ", "", regex=False)
+
+
+def to_code(s: pd.Series) -> np.ndarray:
+    """'010101', 10101, '10101.0' -> 10101 (int32). Valores no válidos -> MISSING."""
+    num = pd.to_numeric(s, errors="coerce")
+    return num.fillna(MISSING).astype("int64").to_numpy().astype(np.int32)
+
+
+def to_str6(codes) -> pd.Series:
+    """Códigos enteros -> texto de 6 dígitos (formato INEI)."""
+    codes = pd.Series(np.asarray(codes))
+    return codes.where(codes >= 0).astype("Int64").astype("string").str.zfill(6)
+
+
+# -------- dimensión --------
+@dataclass
+class UbigeoDim:
+    # tabla ordenada por ubigeo con columnas: ubigeo, prov, dep (int32) y nombres
+    table: pd.DataFrame
+    # diccionarios nombre normalizado -> código
+    dep_index: Dict[str, int] = field(default_factory=dict)
+    prov_index: Dict[str, int] = field(default_factory=dict)      # "DEP|PROV"
+    dist_index: Dict[str, int] = field(default_factory=dict)      # "PROV|DIST"
+    sources: Dict[str, float] = field(default_factory=dict)
+    aliases_version: str = ALIASES_VERSION
+
+    # ---- construcción ----
+    @classmethod
+    def build(cls, csv_path: Path = UBIGEO_CSV, boundary_files: Optional[List[Path]] = None) -> "UbigeoDim":
+        frames = [_read_csv(csv_path)]
+        sources = {str(csv_path): csv_path.stat().st_mtime}
+        for path in boundary_files if boundary_files is not None else BOUNDARY_FILES:
+            if path.exists():
+                frames.append(_read_boundaries(path))
+                sources[str(path)] = path.stat().st_mtime
+        raw = pd.concat(frames, ignore_index=True).drop_duplicates("ubigeo", keep="first")
+        raw = raw.sort_values("ubigeo").reset_index(drop=True)
+
+        table = pd.DataFrame({
+            "ubigeo": raw["ubigeo"].astype(np.int32),
+            "prov": (raw["ubigeo"] // 100).astype(np.int32),
+            "dep": (raw["ubigeo"] // 10000).astype(np.int32),
+            "NOMBDEP": raw["NOMBDEP"].astype("string"),
+            "NOMBPROV": raw["NOMBPROV"].astype("string"),
+            "NOMBDIST": raw["NOMBDIST"].astype("string"),
+        })
+        dim = cls(table=table, sources=sources)
+        dim._index()
+        return dim
+
+    def _index(self) -> None:
+        t = self.table
+        dep_n = normalize_names(t["NOMBDEP"])
+        prov_n = normalize_names(t["NOMBPROV"])
+        dist_n = normalize_names(t["NOMBDIST"])
+        # 'QUISQUI (KICHKI)' también se busca como 'QUISQUI'
+        dist_short = normalize_names(t["NOMBDIST"].str.replace(r"\s*\(.*\)\s*", "", regex=True))
+
+        self.dep_index = dict(zip(dep_n, t["dep"].astype(int)))
+        self.dep_index.update(ALIASES_DEP)
+
+        self.prov_index = dict(zip(t["dep"].astype(str) + "|" + prov_n, t["prov"].astype(int)))
+        self.prov_index.update({f"{d}|{p}": c for (d, p), c in ALIASES_PROV.items()})
+
+        self.dist_index = dict(zip(t["prov"].astype(str) + "|" + dist_short, t["ubigeo"].astype(int)))
+        self.dist_index.update(zip(t["prov"].astype(str) + "|" + dist_n, t["ubigeo"].astype(int)))
+        self.dist_index.update({f"{p}|{n}": c for (p, n), c in ALIASES_DIST.items()})
+
+        # variantes sin espacios ('ANCO HUALLO' / 'ANCOHUALLO')
+        for idx in (self.dep_index, self.prov_index, self.dist_index):
+            idx.update({k.replace(" ", ""): v for k, v in list(idx.items()) if " " in k})
+
+    # ---- caché ----
+    @classmethod
+    def load(cls, snapshot: Path = SNAPSHOT, csv_path: Path = UBIGEO_CSV,
+             boundary_files: Optional[List[Path]] = None) -> "UbigeoDim":
+        """Carga la foto binaria si está vigente; si no, reconstruye y la guarda."""
+        files = [csv_path] + [p for p in (boundary_files if boundary_files is not None else BOUNDARY_FILES) if p.exists()]
+        current = {str(p): p.stat().st_mtime for p in files}
+        if snapshot.exists():
+            try:
+                with open(snapshot, "rb") as fh:
+                    version, dim = pickle.load(fh)
+                if version == SNAPSHOT_VERSION and dim.sources == current and dim.aliases_version == ALIASES_VERSION:
+                    return dim
+            except Exception:
+                pass
+        dim = cls.build(csv_path, boundary_files)
+        dim.save(snapshot)
+        return dim
+
+    def save(self, snapshot: Path = SNAPSHOT) -> None:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        tmp = snapshot.with_suffix(snapshot.suffix + ".tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump((SNAPSHOT_VERSION, self), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(snapshot)
+
+    # ---- nombre -> código ----
+    @staticmethod
+    def _lookup(keys: pd.Series, index: Dict[str, int]) -> np.ndarray:
+        codes = keys.map(index)
+        miss = codes.isna()
+        if miss.any():
+            codes[miss] = _compact(keys[miss]).map(index)
+        return codes.fillna(MISSING).astype(np.int64).to_numpy().astype(np.int32)
+
+    def department_codes(self, dep: pd.Series) -> np.ndarray:
+        return self._lookup(normalize_names(pd.Series(dep)).reset_index(drop=True), self.dep_index)
+
+    def province_codes(self, dep: pd.Series, prov: pd.Series) -> np.ndarray:
+        d = self.department_codes(dep)
+        keys = pd.Series(d.astype(str)) + "|" + normalize_names(pd.Series(prov)).reset_index(drop=True)
+        return self._lookup(keys, self.prov_index)
+
+    def district_codes(self, dep: pd.Series, prov: pd.Series, dist: pd.Series) -> np.ndarray:
+        """(departamento, provincia, distrito) -> ubigeo int32; MISSING si no hay match."""
+        p = self.province_codes(dep, prov)
+        keys = pd.Series(p.astype(str)) + "|" + normalize_names(pd.Series(dist)).reset_index(drop=True)
+        return self._lookup(keys, self.dist_index)
+
+    # ---- código -> jerarquía ----
+    def hierarchy(self, codes) -> pd.DataFrame:
+        """ubigeo (int o texto) -> ubigeo, prov, dep y nombres, en el orden de entrada."""
+        codes = pd.DataFrame({"ubigeo": to_code(pd.Series(np.asarray(codes)))})
+        out = codes.merge(self.table, on="ubigeo", how="left", sort=False)
+        return out.astype({"prov": "Int32", "dep": "Int32"})
+
+    def parents(self, codes) -> Tuple[np.ndarray, np.ndarray]:
+        """(provincia, departamento) de cada ubigeo, solo aritmética entera."""
+        codes = np.asarray(codes, dtype=np.int32)
+        return codes // 100, codes // 10000
+
+    # ---- reporte ----
+    def unmatched(self, df: pd.DataFrame, dep: str, prov: Optional[str] = None,
+                  dist: Optional[str] = None) -> pd.DataFrame:
+        """Combinaciones de nombres de df que no encuentran código."""
+        if dist is not None:
+            codes = self.district_codes(df[dep], df[prov], df[dist])
+            cols = [dep, prov, dist]
+        elif prov is not None:
+            codes = self.province_codes(df[dep], df[prov])
+            cols = [dep, prov]
+        else:
+            codes = self.department_codes(df[dep])
+            cols = [dep]
+        return df.loc[codes == MISSING, cols].drop_duplicates().reset_index(drop=True)
+
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    for enc in ("utf-8", "latin1"):
+        try:
+            raw = pd.read_csv(path, sep=";", dtype=str, encoding=enc)
+            break
+        except UnicodeDecodeError:
+            continue
+    raw = raw.dropna(subset=["IDDIST"])
+    return pd.DataFrame({
+        "ubigeo": to_code(raw["IDDIST"]),
+        "NOMBDEP": raw["NOMBDEP"].str.strip(),
+        "NOMBPROV": raw["NOMBPROV"].str.strip(),
+        "NOMBDIST": raw["NOMBDIST"].str.strip(),
+    })
+
+
+def _read_boundaries(path: Path) -> pd.DataFrame:
+    import geopandas as gpd
+
+    gdf = gpd.read_file(path, ignore_geometry=True)
+    return pd.DataFrame({
+        "ubigeo": to_code(gdf["IDDIST"]),
+        "NOMBDEP": gdf["NOMBDEP"].astype(str).str.strip(),
+        "NOMBPROV": gdf["NOMBPROV"].astype(str).str.strip(),
+        "NOMBDIST": gdf["NOMBDIST"].astype(str).str.strip(),
+    })
+
+
+def main() -> None:
+    dim = UbigeoDim.build()
+    dim.save()
+    print(f"{len(dim.table)} distritos, {dim.table['prov'].nunique()} provincias, "
+          f"{dim.table['dep'].nunique()} departamentos")
+    print(f"Listo.\n- {SNAPSHOT}")
+
+
+if __name__ == "__main__":
+    main()
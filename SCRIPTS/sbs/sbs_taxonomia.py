@@ -0,0 +1,194 @@
+"""
+Taxonomía canónica de sectores económicos y tipos de entidad de las hojas SBS
+("Créditos x SE", "Morosidad x SE").
+
+- códigos enteros estables para sectores (sector_cod) y entidades (entidad_cod)
+- tabla de alias versionada (TAXONOMIA_VERSION): cada alias se compara ya normalizado
+- norm_label memoizado (tildes, saltos de línea, notas "1/", "*", puntuación)
+- el mapeo de columnas se hace sobre los valores únicos (factorize + diccionario),
+  no celda por celda
+- los rótulos que no calzan quedan con código MISSING y se acumulan en UNSEEN
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+TAXONOMIA_VERSION = "2025.1"
+MISSING = -1
+
+# -------- entidades --------
+ENTIDADES: Dict[int, str] = {
+    1: "Banca Múltiple",
+    2: "Empresas Financieras",
+    3: "Cajas Municipales",
+    4: "Cajas Rurales de Ahorro y Crédito",
+    5: "EDPYMEs",
+    6: "Agrobanco",
+    9: "Total",
+}
+
+ALIASES_ENTIDAD: Dict[int, List[str]] = {
+    1: ["banca multiple."],
+    2: ["empresas  financieras"],
+    4: ["caja rurales de ahorro y credito", "cajas rurales de ahorro y credito (miles)", "cajas rurales"],
+    5: ["edpyme", "edpym es"],
+    9: ["total (miles)", "total general", "total,"],
+}
+
+# -------- sectores --------
+# 1..16: sectores CIIU del reporte; 4xx y 7xx: desagregados de manufactura y comercio
+SECTORES: Dict[int, str] = {
+    1: "Agricultura, Ganadería, Caza y Silvicultura",
+    2: "Pesca",
+    3: "Minería",
+    4: "Industria Manufacturera",
+    5: "Electricidad, Gas y Agua",
+    6: "Construcción",
+    7: "Comercio",
+    8: "Hoteles y Restaurantes",
+    9: "Transporte, Almacenamiento y Comunicaciones",
+    10: "Intermediación Financiera",
+    11: "Actividades Inmobiliarias, Empresariales y de Alquiler",
+    12: "Administración Pública y Defensa",
+    13: "Enseñanza",
+    14: "Servicios Sociales y de Salud",
+    15: "Otras Actividades de Servicios Comunitarios",
+    16: "Hogares Privados c/ Serv. Doméstico y Órganos Extraterritoriales",
+    99: "Total",
+    401: "Alimentos, Bebidas y Tabaco",
+    402: "Textiles y Cueros",
+    403: "Madera y Papel",
+    404: "Fabricación de Sustancias y Productos Químicos",
+    405: "Fabricación de Productos de Caucho y Plástico",
+    406: "Fabricación de Productos Minerales No Metálicos",
+    407: "Fabricación de Metales",
+    408: "Maquinaria y Equipo",
+    409: "Fabricación de Vehículos y Equipos de Transporte",
+    410: "Resto Manufactura",
+    701: "Venta y Reparación de Vehículos Automotores",
+    702: "Comercio al por Mayor",
+    703: "Comercio al por Menor",
+}
+
+ALIASES_SECTOR: Dict[int, List[str]] = {
+    1: ["agricultura ganaderia caza y silvicultura", "agropecuario", "agricultura y ganaderia"],
+    3: ["mineria e hidrocarburos", "explotacion de minas y canteras"],
+    4: ["manufactura", "industria manufacturera total"],
+    5: ["electricidad gas y agua potable", "suministro de electricidad gas y agua"],
+    7: ["comercio total"],
+    9: ["transporte almacenamiento y comunicacion", "transporte almacenamiento y comunicaciones total"],
+    11: ["actividades inmobiliarias empresariales y alquiler", "act inmobiliarias empresariales y de alquiler"],
+    12: ["administracion publica y de defensa", "adm publica y defensa",
+         "administracion publica y defensa planes de seguridad social"],
+    14: ["servicios sociales y salud", "actividades de servicios sociales y de salud"],
+    15: ["otras actividades de servicios comunitarios sociales y personales", "otras act de servicios comunitarios"],
+    16: ["hogares privados con servicio domestico y organos extraterritoriales",
+         "hogares privados c serv domestico y organos extraterritoriales",
+         "hogares privados y organos extraterritoriales"],
+    99: ["total general", "total creditos", "total sector economico"],
+    401: ["alimentos bebidas y tabaco"],
+    404: ["fab de sustancias y productos quimicos", "sustancias y productos quimicos"],
+    405: ["fab de productos de caucho y plastico", "caucho y plastico"],
+    406: ["fab de productos minerales no metalicos", "minerales no metalicos"],
+    407: ["fab de metales", "metales"],
+    409: ["fab de vehiculos y equipos de transporte", "vehiculos y equipos de transporte"],
+    410: ["resto de manufactura", "otras manufacturas"],
+    701: ["venta y reparacion de vehiculos", "venta mant y reparacion de vehiculos automotores"],
+    702: ["comercio al por mayor"],
+    703: ["comercio al por menor"],
+}
+
+_FOOTNOTE = re.compile(r"^\s*\d+\s*/\s*|\s*\d+\s*/\s*$|\*+")
+_NON_ALNUM = re.compile(r"[^a-z0-9()]+")
+
+# rótulos que no calzaron: {(tipo, rótulo original)}
+UNSEEN: set = set()
+
+
+@lru_cache(maxsize=None)
+def norm_label(s: object) -> str:
+    """Forma canónica de comparación: sin tildes, minúsculas, sin notas ni puntuación."""
+    if s is None or (isinstance(s, float) and np.isnan(s)):
+        return ""
+    s = unicodedata.normalize("NFKD", str(s)).encode("ascii", "ignore").decode().lower()
+    s = _FOOTNOTE.sub(" ", s)
+    return " ".join(_NON_ALNUM.sub(" ", s).split())
+
+
+def _build_index(canon: Dict[int, str], aliases: Dict[int, List[str]]) -> Dict[str, int]:
+    index: Dict[str, int] = {}
+    for code, name in canon.items():
+        for label in [name, *aliases.get(code, [])]:
+            key = norm_label(label)
+            if index.get(key, code) != code:
+                raise ValueError(f"Alias ambiguo '{label}' ({index[key]} y {code})")
+            index[key] = code
+    return index
+
+
+SECTOR_INDEX = _build_index(SECTORES, ALIASES_SECTOR)
+ENTIDAD_INDEX = _build_index(ENTIDADES, ALIASES_ENTIDAD)
+ENTIDAD_ORDEN: List[str] = list(ENTIDADES.values())
+
+
+# -------- mapeo vectorizado --------
+def _codes(values: pd.Series, index: Dict[str, int], kind: str) -> np.ndarray:
+    """Código entero por celda: normaliza y busca solo los valores únicos."""
+    pos, uniques = pd.factorize(values, use_na_sentinel=True)
+    lut = np.array([index.get(norm_label(u), MISSING) for u in uniques] + [MISSING], dtype=np.int16)
+    for u, c in zip(uniques, lut):
+        if c == MISSING and norm_label(u):
+            UNSEEN.add((kind, str(u)))
+    return lut[pos]          # pos == -1 (NA) toma el último elemento (MISSING)
+
+
+def sector_codes(values: pd.Series) -> np.ndarray:
+    return _codes(values, SECTOR_INDEX, "sector")
+
+
+def entidad_codes(values: pd.Series) -> np.ndarray:
+    return _codes(values, ENTIDAD_INDEX, "entidad")
+
+
+def entity_columns(columns: Iterable[object]) -> Dict[str, str]:
+    """Encabezados reales de entidades -> nombre estándar (el primero que calce por entidad)."""
+    mapping: Dict[str, str] = {}
+    taken = set()
+    for c in columns:
+        code = ENTIDAD_INDEX.get(norm_label(c))
+        if code is not None and code not in taken:
+            mapping[c] = ENTIDADES[code]
+            taken.add(code)
+    return mapping
+
+
+def add_codes(tidy: pd.DataFrame, sector_col: str = "Sector Económico", entidad_col: str = "Entidad") -> pd.DataFrame:
+    """Agrega sector_cod/entidad_cod y reemplaza los rótulos reconocidos por el canónico."""
+    out = tidy.copy()
+    sc = sector_codes(out[sector_col])
+    ec = entidad_codes(out[entidad_col].astype(object))
+    known = sc != MISSING
+    canon = pd.Series(SECTORES).reindex(sc[known]).to_numpy()
+    out.loc[known, sector_col] = canon
+    out["sector_cod"] = sc
+    out["entidad_cod"] = ec.astype(np.int8)
+    return out
+
+
+def join_keys() -> List[str]:
+    """Claves enteras para unir crédito y morosidad."""
+    return ["date", "sector_cod", "entidad_cod"]
+
+
+def report_unseen(clear: bool = True) -> List[Tuple[str, str]]:
+    """Imprime y retorna los rótulos sin alias en la taxonomía."""
+    items = sorted(UNSEEN)
+    for kind, label in items:
+        print(f"[WARN] {kind} sin alias (taxonomía {TAXONOMIA_VERSION}): {label!r}")
+    if clear:
+        UNSEEN.clear()
+    return items
@@ -1,5 +1,6 @@
 import os
 import re
+import sys
 import calendar
 from datetime import datetime
 from pathlib import Path
@@ -7,6 +8,9 @@ from typing import Optional, Dict, List
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import sbs_taxonomia as tx  # noqa: E402
+
 # -------- CONFIG --------
 BASE_DIR = Path(r"C:\Users\José Estrada\OneDrive - ABC Capital\Web Scraping\SBS\SF_Data") #cambiar la ruta a la carpeta con tu base de datos creada con el script previo
 WANTED_SHEET = "Créditos x SE"
@@ -19,24 +23,11 @@ ABREV_TO_MONTH = {
 }
 FILE_REGEX = re.compile(r"^SF-([a-z]{2})(\d{4})\.xls(x)?$", re.IGNORECASE)
 
-# Columnas estándar (entidades)
-TARGET_COLS_STD = [
-    "Banca Múltiple",
-    "Empresas Financieras",
-    "Cajas Municipales",
-    "Cajas Rurales de Ahorro y Crédito",
-    "EDPYMEs",
-    "Agrobanco",
-    "Total",
-]
+# Columnas estándar (entidades), en el orden de la taxonomía
+TARGET_COLS_STD = tx.ENTIDAD_ORDEN
 
 # -------- utilidades --------
-def norm_text(s: str) -> str:
-    s = "" if s is None else str(s)
-    s = s.strip().lower()
-    for a,b in [("á","a"),("é","e"),("í","i"),("ó","o"),("ú","u")]:
-        s = s.replace(a,b)
-    return re.sub(r"\s+"," ", s)
+norm_text = tx.norm_label   # memoizado
 
 def parse_period(fname: str) -> Optional[Dict[str, object]]:
     m = FILE_REGEX.match(fname)
@@ -96,26 +87,7 @@ def find_header_row(df: pd.DataFrame, search_limit: int = 60) -> Optional[int]:
     return None
 
 def map_columns_to_targets(cols: List[str]) -> Dict[str, str]:
-    real_cols_norm = {norm_text(c): c for c in cols}
-    mapping: Dict[str, str] = {}
-    patterns = {
-        "Banca Múltiple": ["banca multiple", "banca multiple."],
-        "Empresas Financieras": ["empresas financieras", "empresas  financieras", "empresas\nfinancieras"],
-        "Cajas Municipales": ["cajas municipales", "cajas\nmunicipales"],
-        "Cajas Rurales de Ahorro y Crédito": [
-            "cajas rurales de ahorro y credito", "caja rurales de ahorro y credito",
-            "cajas rurales\nde ahorro y credito", "cajas rurales de ahorro y credito."
-        ],
-        "EDPYMEs": ["edpymes", "edpyme", "edpym es"],
-        "Agrobanco": ["agrobanco"],
-        "Total": ["total", "total (miles)", "total general", "total,"],
-    }
-    for std_name, keys in patterns.items():
-        for k in keys:
-            if k in real_cols_norm:
-                mapping[real_cols_norm[k]] = std_name
-                break
-    return mapping
+    return tx.entity_columns(cols)
 
 def clean_numbers(series: pd.Series) -> pd.Series:
     return (series.astype(str)
@@ -209,7 +181,8 @@ def clean_one(path: Path) -> Optional[pd.DataFrame]:
     # Orden sugerido
     entidad_order = [c for c in TARGET_COLS_STD if c in value_cols]
     tidy["Entidad"] = pd.Categorical(tidy["Entidad"], categories=entidad_order, ordered=True)
-    tidy = tidy.sort_values(["year","date","Sector Económico","Entidad"]).reset_index(drop=True)
+    tidy = tx.add_codes(tidy)
+    tidy = tidy.sort_values(["year","date","sector_cod","Entidad"]).reset_index(drop=True)
 
     return tidy
 
@@ -225,6 +198,7 @@ def build_db(base: Path) -> pd.DataFrame:
             frames.append(out)
     if not frames:
         raise RuntimeError("No se pudo construir la base; revisa archivos/hojas.")
+    tx.report_unseen()
     return pd.concat(frames, ignore_index=True, sort=False)
 
 def main():
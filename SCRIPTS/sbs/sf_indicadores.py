@@ -0,0 +1,165 @@
+"""
+Indicadores derivados de crédito y morosidad sectorial (SBS), mantenidos de forma incremental.
+
+Parte de las bases que generan sf_creditos_sector.py y sf_morosidad_sector.py y calcula,
+vectorizado sobre la grilla fecha x (sector_cod, entidad_cod):
+- monto_mom / monto_yoy: variación mensual e interanual del monto
+- monto_ma12 / morosidad_ma12: promedios móviles de 12 meses
+- share_entidad: participación del sector en el crédito del tipo de entidad
+  (sobre la suma de los sectores CIIU 1..16, así no se cuentan los desagregados)
+- cartera_morosa: monto x morosidad / 100
+
+Se guarda junto a las bases (Indicadores_Sectorial.parquet) con una huella por mes. Al
+llegar un mes nuevo (o si se revisa uno) solo se recalculan los meses cuya ventana lo
+incluye (del mes cambiado a 12 meses después), leyendo los 12 meses previos como contexto.
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import sbs_taxonomia as tx  # noqa: E402
+
+# -------- CONFIG --------
+BASE_DIR = Path(r"C:\Users\José Estrada\OneDrive - ABC Capital\Web Scraping\SBS\SF_Data") #misma carpeta que los scripts de crédito y morosidad
+CREDITOS_XLSX = BASE_DIR / "Creditos_Sectorial.xlsx"
+MOROSIDAD_XLSX = BASE_DIR / "Morosidad_Sectorial.xlsx"
+OUT_PARQUET = BASE_DIR / "Indicadores_Sectorial.parquet"
+
+WINDOW = 12                             # meses de la ventana más larga (yoy, ma12)
+SECTORES_BASE = [c for c in tx.SECTORES if 1 <= c <= 16]
+KEYS = ["sector_cod", "entidad_cod"]
+
+
+# -------- bases --------
+def read_base(path: Path, value_col: str) -> pd.DataFrame:
+    df = pd.read_excel(path)
+    if "sector_cod" not in df.columns or "entidad_cod" not in df.columns:
+        df = tx.add_codes(df)
+    df = df[(df["sector_cod"] != tx.MISSING) & (df["entidad_cod"] != tx.MISSING)]
+    df["date"] = pd.to_datetime(df["date"])
+    return df[["date", *KEYS, value_col]]
+
+
+def merge_bases(cred: pd.DataFrame, mor: pd.DataFrame) -> pd.DataFrame:
+    base = cred.merge(mor, on=tx.join_keys(), how="outer")
+    base["month"] = base["date"].dt.to_period("M")
+    return base.drop(columns="date").groupby(["month", *KEYS], as_index=False).sum(min_count=1)
+
+
+def month_hashes(base: pd.DataFrame) -> Dict[str, str]:
+    """Huella de los valores base por mes (para detectar meses nuevos o revisados)."""
+    b = base.sort_values(["month", *KEYS])
+    h = pd.util.hash_pandas_object(b[[*KEYS, "monto", "morosidad"]], index=False).to_numpy()
+    months = b["month"].astype(str).to_numpy()
+    out: Dict[str, str] = {}
+    for m in pd.unique(months):
+        out[m] = format(int(np.bitwise_xor.reduce(h[months == m])), "x")
+    return out
+
+
+# -------- cálculo --------
+def compute(base: pd.DataFrame, months: Optional[pd.PeriodIndex] = None) -> pd.DataFrame:
+    """Indicadores para `months` (por defecto todos), usando base como contexto."""
+    full = pd.period_range(base["month"].min(), base["month"].max(), freq="M")
+    wide = base.pivot_table(index="month", columns=KEYS, values=["monto", "morosidad"], aggfunc="sum")
+    wide = wide.reindex(full)                      # meses faltantes = NaN, así shift(1) es el mes previo
+    monto = wide["monto"]
+    moro = wide["morosidad"].reindex(columns=monto.columns)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mom = monto / monto.shift(1) - 1
+        yoy = monto / monto.shift(WINDOW) - 1
+    ma12 = monto.rolling(WINDOW, min_periods=WINDOW).mean()
+    moro_ma12 = moro.rolling(WINDOW, min_periods=WINDOW).mean()
+
+    base_cols = monto.columns.get_level_values("sector_cod").isin(SECTORES_BASE)
+    denom = monto.loc[:, base_cols].T.groupby(level="entidad_cod").sum(min_count=1).T
+    share = monto / denom.reindex(columns=monto.columns.get_level_values("entidad_cod")).to_numpy()
+    cartera = monto * moro / 100.0
+
+    parts = {"monto": monto, "morosidad": moro, "monto_mom": mom, "monto_yoy": yoy, "monto_ma12": ma12,
+             "morosidad_ma12": moro_ma12, "share_entidad": share, "cartera_morosa": cartera}
+    if months is not None:
+        parts = {k: v.loc[v.index.isin(months)] for k, v in parts.items()}
+    out = pd.concat({k: v.stack(KEYS, future_stack=True) for k, v in parts.items()}, axis=1)
+    out.index.names = ["month", *KEYS]
+    out = out.dropna(subset=["monto", "morosidad"], how="all").reset_index()
+    out["date"] = out["month"].dt.to_timestamp(how="end").dt.normalize()
+    out["Sector Económico"] = out["sector_cod"].map(tx.SECTORES)
+    out["Entidad"] = out["entidad_cod"].map(tx.ENTIDADES)
+    out = out.astype({"sector_cod": np.int16, "entidad_cod": np.int8})
+    cols = ["date", "sector_cod", "entidad_cod", "Sector Económico", "Entidad", *parts]
+    return out[cols].sort_values(["date", *KEYS]).reset_index(drop=True)
+
+
+def affected_months(old: Dict[str, str], new: Dict[str, str]) -> Set[pd.Period]:
+    """Meses nuevos o revisados y los WINDOW meses siguientes (su ventana los incluye)."""
+    changed = [pd.Period(m, "M") for m, h in new.items() if old.get(m) != h]
+    changed += [pd.Period(m, "M") for m in old if m not in new]
+    last = max(pd.Period(m, "M") for m in new)
+    out: Set[pd.Period] = set()
+    for m in changed:
+        out.update(p for p in pd.period_range(m, m + WINDOW, freq="M") if p <= last)
+    return out
+
+
+# -------- persistencia --------
+def _meta_path(out: Path) -> Path:
+    return out.with_suffix(".json")
+
+
+def update(cred: pd.DataFrame, mor: pd.DataFrame, out: Path = OUT_PARQUET) -> pd.DataFrame:
+    """Recalcula solo los meses afectados y reescribe la tabla de indicadores."""
+    base = merge_bases(cred, mor)
+    hashes = month_hashes(base)
+    meta_path = _meta_path(out)
+    prev_meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() and out.exists() else {}
+    old_hashes = prev_meta.get("months", {}) if prev_meta.get("window") == WINDOW else {}
+
+    if not old_hashes:
+        result = compute(base)
+        print(f"[FULL] {len(hashes)} meses")
+    else:
+        todo = affected_months(old_hashes, hashes)
+        if not todo:
+            print("[OK] Indicadores al día")
+            return pd.read_parquet(out)
+        first = min(todo)
+        context = base[base["month"] >= first - WINDOW]
+        fresh = compute(context, pd.PeriodIndex(sorted(todo)))
+        prev = pd.read_parquet(out)
+        prev_months = prev["date"].dt.to_period("M")
+        keep = ~prev_months.isin(todo) & prev_months.astype(str).isin(hashes)
+        result = pd.concat([prev[keep], fresh], ignore_index=True).sort_values(["date", *KEYS]).reset_index(drop=True)
+        print(f"[INC] {len(todo)} mes(es) recalculados desde {first}")
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    result.to_parquet(tmp, index=False)
+    tmp.replace(out)
+    meta_path.write_text(json.dumps({"window": WINDOW, "taxonomia": tx.TAXONOMIA_VERSION, "months": hashes},
+                                    indent=2), encoding="utf-8")
+    return result
+
+
+def load(out: Path = OUT_PARQUET, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Lectura para tableros/reportes (solo las columnas pedidas)."""
+    return pd.read_parquet(out, columns=columns)
+
+
+def main():
+    for p in (CREDITOS_XLSX, MOROSIDAD_XLSX):
+        if not p.exists():
+            raise FileNotFoundError(f"No existe {p}; corre antes sf_creditos_sector.py / sf_morosidad_sector.py")
+    cred = read_base(CREDITOS_XLSX, "monto")
+    mor = read_base(MOROSIDAD_XLSX, "morosidad")
+    update(cred, mor, OUT_PARQUET)
+    print(f"Listo.\n- {OUT_PARQUET}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import re
+import sys
 import calendar
 from datetime import datetime
 from pathlib import Path
@@ -7,6 +8,9 @@ from typing import Optional, Dict, List
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import sbs_taxonomia as tx  # noqa: E402
+
 # -------- CONFIG --------
 BASE_DIR = Path(r"C:\Users\José Estrada\OneDrive - ABC Capital\Web Scraping\SBS\SF_Data") #cambiar la ruta a la carpeta con tu base de datos creada con el script previo
 WANTED_SHEET = "Morosidad x SE"
@@ -22,24 +26,10 @@ ABREV_TO_MONTH = {
 }
 FILE_REGEX = re.compile(r"^SF-([a-z]{2})(\d{4})\.xls(x)?$", re.IGNORECASE)
 
-TARGET_COLS = [
-    "Banca Múltiple",
-    "Empresas Financieras",
-    "Cajas Municipales",
-    "Cajas Rurales de Ahorro y Crédito",
-    "EDPYMEs",
-    "Agrobanco",
-    "Total",
-]
+TARGET_COLS = tx.ENTIDAD_ORDEN
 
 # -------- utilidades --------
-def norm_simple(s: str) -> str:
-    if s is None:
-        return ""
-    return (str(s).lower().strip()
-              .replace("á","a").replace("é","e").replace("í","i")
-              .replace("ó","o").replace("ú","u")
-              .replace("\n"," "))
+norm_simple = tx.norm_label   # memoizado
 
 def parse_period(fname: str) -> Optional[Dict[str, object]]:
     m = FILE_REGEX.match(fname)
@@ -98,26 +88,7 @@ def find_sheet(path: Path, wanted: str) -> Optional[str]:
 
 def map_present_to_standard(columns: List[str]) -> Dict[str, str]:
     """Mapea encabezados reales -> estándar para las columnas de entidades."""
-    real_norm = {norm_simple(c): c for c in columns}
-    patterns = {
-        "Banca Múltiple": ["banca multiple"],
-        "Empresas Financieras": ["empresas financieras", "empresas  financieras"],
-        "Cajas Municipales": ["cajas municipales"],
-        "Cajas Rurales de Ahorro y Crédito": [
-            "cajas rurales de ahorro y credito", "caja rurales de ahorro y credito",
-            "cajas rurales de ahorro y credito (miles)"
-        ],
-        "EDPYMEs": ["edpymes", "edpyme"],
-        "Agrobanco": ["agrobanco"],
-        "Total": ["total","total (miles)","total general"],
-    }
-    mapping = {}
-    for std_name, keys in patterns.items():
-        for k in keys:
-            if k in real_norm:
-                mapping[real_norm[k]] = std_name
-                break
-    return mapping
+    return tx.entity_columns(columns)
 
 # -------- limpieza por archivo --------
 def clean_one(path: Path) -> Optional[pd.DataFrame]:
@@ -197,7 +168,8 @@ def clean_one(path: Path) -> Optional[pd.DataFrame]:
     # Orden sugerido
     entidad_order = [c for c in TARGET_COLS if c in value_cols]
     tidy["Entidad"] = pd.Categorical(tidy["Entidad"], categories=entidad_order, ordered=True)
-    tidy = tidy.sort_values(["year","date","Sector Económico","Entidad"]).reset_index(drop=True)
+    tidy = tx.add_codes(tidy)
+    tidy = tidy.sort_values(["year","date","sector_cod","Entidad"]).reset_index(drop=True)
 
     return tidy
 
@@ -212,6 +184,7 @@ def build_db(base: Path) -> pd.DataFrame:
             frames.append(out)
     if not frames:
         raise RuntimeError("No se pudo construir la base; revisa archivos.")
+    tx.report_unseen()
     db = pd.concat(frames, ignore_index=True, sort=False)
     return db
 